@@ -0,0 +1,97 @@
+import json
+import os
+import numpy as np
+
+from preprocessing import Preprocessor
+from profiling import profiled
+
+# Layout of an artifact file:
+#   MAGIC | header length (uint64) | JSON header | arrays, each 64-byte aligned
+# The header keeps the small fitted values (medians, modes, column names,
+# intercept) and the dtype/shape/offset of every array, so that loading only
+# parses the header and memory-maps the array block.
+MAGIC = b'HPRICE01'
+ALIGNMENT = 64
+
+
+class LinearModel:
+
+  def __init__(self, coef, intercept):
+    self.coef_ = coef
+    self.intercept_ = intercept
+
+  # einsum sums each row on its own and in the same order, so a house gets
+  # the same price whatever the batch it is scored in; a BLAS matrix-vector
+  # product may round differently depending on the number of rows.
+  def predict(self, X):
+    X = np.asarray(X, dtype=np.float64)
+    return np.einsum('ij,j->i', X, self.coef_) + self.intercept_
+
+
+def align(offset):
+  return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+@profiled
+def save_artifact(path, preprocessor, model):
+  meta, arrays = preprocessor.get_state()
+  meta['intercept'] = float(model.intercept_)
+  arrays['coef'] = np.asarray(model.coef_, dtype=np.float64)
+  write_arrays(path, meta, arrays)
+
+
+@profiled
+def load_artifact(path):
+  meta, arrays = read_arrays(path)
+  preprocessor = Preprocessor.from_state(meta, arrays)
+  model = LinearModel(arrays['coef'], meta['intercept'])
+  return (preprocessor, model)
+
+
+# The file is written under a temporary name next to `path` and renamed over
+# it: a process that loaded the old file keeps mapping the old inode, instead
+# of seeing it truncated and rewritten under its arrays.
+def write_arrays(path, meta, arrays):
+  arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+  layout = {}
+  offset = 0
+  for name, array in arrays.items():
+    layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                    'offset': offset}
+    offset = align(offset + array.nbytes)
+
+  header = json.dumps({'meta': meta, 'arrays': layout}).encode('utf-8')
+  data_start = align(len(MAGIC) + 8 + len(header))
+  temp_path = '%s.%d.tmp' % (path, os.getpid())
+  try:
+    with open(temp_path, 'wb') as f:
+      f.write(MAGIC)
+      f.write(np.uint64(len(header)).tobytes())
+      f.write(header)
+      for name, array in arrays.items():
+        f.seek(data_start + layout[name]['offset'])
+        f.write(array.tobytes())
+    os.replace(temp_path, path)
+  except BaseException:
+    if os.path.exists(temp_path):
+      os.remove(temp_path)
+    raise
+
+
+def read_arrays(path):
+  with open(path, 'rb') as f:
+    if f.read(len(MAGIC)) != MAGIC:
+      raise ValueError('%s is not a model artifact' % path)
+    header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+    header = json.loads(f.read(header_length))
+
+  data_start = align(len(MAGIC) + 8 + header_length)
+  buffer = np.memmap(path, dtype=np.uint8, mode='r')
+  arrays = {}
+  for name, spec in header['arrays'].items():
+    dtype = np.dtype(spec['dtype'])
+    count = int(np.prod(spec['shape']))
+    arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                 offset=data_start + spec['offset'])\
+                     .reshape(spec['shape'])
+  return (header['meta'], arrays)
@@ -0,0 +1,84 @@
+# Compares the peak memory (max RSS) and run time of a fresh process that
+# fits the preprocessing, the XGBoost feature selection and the linear model
+# on train.csv and predicts batch.csv, with the design matrices built as
+# one-hot DataFrames (mixed float64 and uint8, cast to float by XGBoost and
+# LinearRegression) or as one float32 buffer (solver.prepare_data). A process
+# that only reads the two files gives the baseline.
+#
+#   python -m benchmarks.bench_design [n_rows ...]
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import print_row
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = [20000, 100000]
+
+PROLOGUE = '''
+import resource
+import time
+import solver
+from loading import read_houses
+train_df = read_houses('train.csv')
+batch_df = read_houses('batch.csv')
+start = time.perf_counter()
+'''
+
+READ_ONLY = ''
+
+FRAMES = '''
+from preprocessing import Preprocessor
+from sklearn.linear_model import LinearRegression
+train_df, y_train = solver.split_target(train_df)
+preprocessor = Preprocessor()
+X_train = preprocessor.fit_transform(train_df)
+preprocessor.feature_mask = solver.select_features_with_xgboost(
+  X_train, y_train, cache_dir=None)
+X_train = preprocessor.select(X_train)
+model = LinearRegression().fit(X_train, y_train)
+model.predict(preprocessor.transform(batch_df))
+'''
+
+SHARED_BUFFER = '''
+preprocessor, X_train, y_train, X_pred = solver.prepare_data(train_df,
+                                                             batch_df)
+model = solver.train_model(X_train, y_train)
+model.predict(X_pred)
+'''
+
+EPILOGUE = '''
+print(time.perf_counter() - start,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+def run_process(script, work_dir):
+  env = dict(os.environ, PYTHONPATH=REPO_DIR)
+  output = subprocess.run([sys.executable, '-c',
+                           PROLOGUE + script + EPILOGUE],
+                          cwd=work_dir, env=env, check=True,
+                          capture_output=True, text=True).stdout
+  seconds, max_rss_kb = output.split()[-2:]
+  return (float(seconds), int(max_rss_kb) / 2 ** 10)
+
+
+def main(sizes):
+  candidates = [('read only', READ_ONLY), ('frames', FRAMES),
+                ('float32 buffer', SHARED_BUFFER)]
+  print_row('rows', 'method', 'time (s)', 'max RSS (MB)')
+  for n_rows in sizes:
+    with tempfile.TemporaryDirectory() as work_dir:
+      make_houses(n_rows).to_csv(os.path.join(work_dir, 'train.csv'),
+                                 index=False)
+      make_houses(n_rows, seed=1, with_target=False)\
+        .to_csv(os.path.join(work_dir, 'batch.csv'), index=False)
+      for name, script in candidates:
+        seconds, max_rss = run_process(script, work_dir)
+        print_row(n_rows, name, '%.2f' % seconds, '%.0f' % max_rss)
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
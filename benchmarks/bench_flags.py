@@ -0,0 +1,70 @@
+# Compares the row-wise apply()/map(lambda) flags that solver used to build
+# with the whole-column comparisons of features.add_flags.
+#
+#   python -m benchmarks.bench_flags [n_rows ...]
+import sys
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import best_time, print_row
+from features import add_flags
+from preprocessing import SPECIAL_FLAGS, NONZERO_FLAGS
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# apply(axis=1) is too slow to be worth timing past this size.
+LEGACY_MAX_ROWS = 200000
+
+
+def legacy_flags(dataset_df):
+  def Exter2(col):
+    if col['Exterior2nd'] == col['Exterior1st']:
+      return 1
+    else:
+      return 0
+  dataset_df['ExteriorMatch_Flag'] = dataset_df.apply(Exter2, axis=1)
+
+  def PoolFlag(col):
+    if col['PoolArea'] == 0:
+      return 0
+    else:
+      return 1
+  dataset_df['HasPool_Flag'] = dataset_df.apply(PoolFlag, axis=1)
+
+  def ConditionMatch(col):
+    if col['Condition1'] == col['Condition2']:
+      return 0
+    else:
+      return 1
+  dataset_df['Diff2ndCondition_Flag'] = dataset_df.apply(ConditionMatch, axis=1)
+
+  dataset_df['BsmtFinSf2_Flag'] = dataset_df['BsmtFinSF2'].map(lambda x:0 if x==0 else 1)
+  dataset_df['LowQualFinSF_Flag'] = dataset_df['LowQualFinSF']\
+                                    .map(lambda x:0 if x==0 else 1)
+  return dataset_df
+
+
+def vectorized_flags(dataset_df):
+  return add_flags(dataset_df, SPECIAL_FLAGS + NONZERO_FLAGS)
+
+
+def check_same_flags(dataset_df):
+  expected = legacy_flags(dataset_df.copy())
+  actual = vectorized_flags(dataset_df.copy())
+  for flag in SPECIAL_FLAGS + NONZERO_FLAGS:
+    assert (expected[flag.name].to_numpy() == actual[flag.name].to_numpy()).all(), flag.name
+
+
+def main(sizes):
+  check_same_flags(make_houses(2000, with_target=False))
+  print_row('rows', 'apply (s)', 'vectorized (s)', 'speedup')
+  for n_rows in sizes:
+    houses_df = make_houses(n_rows, with_target=False)
+    new = best_time(lambda: vectorized_flags(houses_df.copy()))
+    if n_rows <= LEGACY_MAX_ROWS:
+      old = best_time(lambda: legacy_flags(houses_df.copy()), repeat=1)
+      print_row(n_rows, '%.4f' % old, '%.4f' % new, '%.1fx' % (old / new))
+    else:
+      print_row(n_rows, '-', '%.4f' % new, '-')
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,72 @@
+# Compares the imputation solver used to run, a groupby().transform(lambda)
+# for LotFrontage and a .mode() per column, with imputation.Imputer learning
+# the same statistics and filling them in one fillna().
+#
+#   python -m benchmarks.bench_imputation [n_rows ...]
+import sys
+
+import numpy as np
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import best_time, print_row
+from imputation import Imputer
+from loading import CATEGORICAL_COLUMNS
+from preprocessing import IMPUTATIONS
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+MODE_FEATURES = ['MSZoning', 'Electrical', 'KitchenQual', 'Exterior1st',
+                 'Exterior2nd', 'SaleType', 'Functional']
+
+
+def legacy_imputation(dataset_df):
+  for feature in ("PoolQC", "MiscFeature", "Alley", "Fence", "FireplaceQu",
+                  "GarageType", "GarageFinish", "GarageQual", "GarageCond",
+                  "BsmtQual", "BsmtCond", "BsmtExposure", "BsmtFinType1",
+                  "BsmtFinType2", "MasVnrType"):
+    dataset_df[feature] = dataset_df[feature].fillna("None")  
+  dataset_df["LotFrontage"] = dataset_df.groupby("Neighborhood")["LotFrontage"].transform(
+                          lambda x: x.fillna(x.median()))
+  for feature in ("GarageYrBlt", "GarageArea", "GarageCars", "BsmtFinSF1", 
+                  "BsmtFinSF2", "BsmtUnfSF", "TotalBsmtSF", "MasVnrArea",
+                  "BsmtFullBath", "BsmtHalfBath"):
+    dataset_df[feature] = dataset_df[feature].fillna(0) 
+  for feature in MODE_FEATURES:
+    dataset_df[feature] = dataset_df[feature]\
+                          .fillna(dataset_df[feature].mode()[0])
+  return dataset_df
+
+
+def engine_imputation(dataset_df):
+  return Imputer(IMPUTATIONS).fit(dataset_df).transform(dataset_df)
+
+
+# The compact schema read_houses loads, which the legacy code cannot fill:
+# fillna() rejects values that are not already categories.
+def as_categories(houses_df):
+  return houses_df.astype({column: 'category' for column in CATEGORICAL_COLUMNS
+                           if column in houses_df})
+
+
+def check_same_imputation(dataset_df):
+  expected = legacy_imputation(dataset_df.copy())
+  actual = engine_imputation(dataset_df.copy())
+  for column in expected:
+    assert np.array_equal(np.asarray(expected[column], dtype=object),
+                          np.asarray(actual[column], dtype=object)), column
+
+
+def main(sizes):
+  check_same_imputation(make_houses(2000, with_target=False))
+  print_row('rows', 'legacy (s)', 'Imputer (s)', 'speedup', 'category (s)')
+  for n_rows in sizes:
+    houses_df = make_houses(n_rows, with_target=False)
+    compact_df = as_categories(houses_df)
+    old = best_time(lambda: legacy_imputation(houses_df.copy()))
+    new = best_time(lambda: engine_imputation(houses_df.copy()))
+    compact = best_time(lambda: engine_imputation(compact_df.copy()))
+    print_row(n_rows, '%.4f' % old, '%.4f' % new, '%.1fx' % (old / new),
+              '%.4f' % compact)
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
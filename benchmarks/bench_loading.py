@@ -0,0 +1,41 @@
+# Compares reading a houses CSV with default dtypes, with the compact schema
+# of loading.py, and back from its Feather cache: load time and the deep
+# memory size of the resulting frame.
+#
+#   python -m benchmarks.bench_loading [n_rows ...]
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import best_time, print_row
+from loading import read_csv_typed, read_houses
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def frame_mb(houses_df):
+  return houses_df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def main(sizes):
+  print_row('rows', 'method', 'time (s)', 'frame (MB)')
+  with tempfile.TemporaryDirectory() as work_dir:
+    path = os.path.join(work_dir, 'train.csv')
+    for n_rows in sizes:
+      make_houses(n_rows).to_csv(path, index=False)
+      read_houses(path)
+      candidates = [
+        ('default csv', lambda: pd.read_csv(path, header=0)),
+        ('typed csv', lambda: read_csv_typed(path)),
+        ('feather cache', lambda: read_houses(path)),
+      ]
+      for name, load in candidates:
+        seconds = best_time(load)
+        print_row(n_rows, name, '%.3f' % seconds, '%.1f' % frame_mb(load()))
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,39 @@
+# Compares the chain of per-column pd.get_dummies calls the preprocessing used
+# to make with the single-pass OneHotEncoder (dense frame and sparse matrix).
+#
+#   python -m benchmarks.bench_one_hot [n_rows ...]
+import sys
+
+import pandas as pd
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import best_time, print_row
+from encoding import OneHotEncoder
+from preprocessing import ONE_HOT_FEATURES, Preprocessor
+
+DEFAULT_SIZES = [10000, 100000, 500000]
+
+
+def legacy_one_hot(dataset_df):
+  for column in ONE_HOT_FEATURES:
+    dataset_df = pd.get_dummies(dataset_df, columns=[column], prefix=column)
+  return dataset_df
+
+
+def main(sizes):
+  preprocessor = Preprocessor().fit(make_houses(2000, with_target=False))
+  print_row('rows', 'get_dummies (s)', 'dense (s)', 'sparse (s)', 'speedup')
+  for n_rows in sizes:
+    houses_df = make_houses(n_rows, seed=1, with_target=False)
+    engineered_df = preprocessor.engineer_features(houses_df)
+    encoder = OneHotEncoder(ONE_HOT_FEATURES).fit(engineered_df)
+
+    old = best_time(lambda: legacy_one_hot(engineered_df), repeat=1)
+    dense = best_time(lambda: encoder.transform(engineered_df))
+    sparse = best_time(lambda: encoder.encode(engineered_df, sparse=True))
+    print_row(n_rows, '%.3f' % old, '%.3f' % dense, '%.3f' % sparse,
+              '%.1fx' % (old / dense))
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,108 @@
+# Compares the 45 one-column-at-a-time insertions create_polynomial_features
+# used to make with features.add_powers writing one float64 or float32 block:
+# run time, peak memory allocated while adding them (tracemalloc) and the
+# memory of the resulting frame.
+#
+#   python -m benchmarks.bench_polynomial [n_rows ...]
+import sys
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import best_time, print_row
+from features import add_powers
+from preprocessing import POLYNOMIAL_FEATURES
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def create_quadratic_features(dataset_df):
+  dataset_df["OverallQual-2"] = dataset_df["OverallQual"] ** 2
+  dataset_df["GrLivArea-2"] = dataset_df["GrLivArea"] ** 2
+  dataset_df["GarageCars-2"] = dataset_df["GarageCars"] ** 2
+  dataset_df["GarageArea-2"] = dataset_df["GarageArea"] ** 2
+  dataset_df["TotalBsmtSF-2"] = dataset_df["TotalBsmtSF"] ** 2
+  dataset_df["1stFlrSF-2"] = dataset_df["1stFlrSF"] ** 2
+  dataset_df["FullBath-2"] = dataset_df["FullBath"] ** 2
+  dataset_df["TotRmsAbvGrd-2"] = dataset_df["TotRmsAbvGrd"] ** 2
+  dataset_df["Fireplaces-2"] = dataset_df["Fireplaces"] ** 2
+  dataset_df["MasVnrArea-2"] = dataset_df["MasVnrArea"] ** 2
+  dataset_df["BsmtFinSF1-2"] = dataset_df["BsmtFinSF1"] ** 2
+  dataset_df["LotFrontage-2"] = dataset_df["LotFrontage"] ** 2
+  dataset_df["WoodDeckSF-2"] = dataset_df["WoodDeckSF"] ** 2
+  dataset_df["OpenPorchSF-2"] = dataset_df["OpenPorchSF"] ** 2
+  dataset_df["2ndFlrSF-2"] = dataset_df["2ndFlrSF"] ** 2
+
+
+def create_cubic_features(dataset_df):
+  dataset_df["OverallQual-3"] = dataset_df["OverallQual"] ** 3
+  dataset_df["GrLivArea-3"] = dataset_df["GrLivArea"] ** 3
+  dataset_df["GarageCars-3"] = dataset_df["GarageCars"] ** 3
+  dataset_df["GarageArea-3"] = dataset_df["GarageArea"] ** 3
+  dataset_df["TotalBsmtSF-3"] = dataset_df["TotalBsmtSF"] ** 3
+  dataset_df["1stFlrSF-3"] = dataset_df["1stFlrSF"] ** 3
+  dataset_df["FullBath-3"] = dataset_df["FullBath"] ** 3
+  dataset_df["TotRmsAbvGrd-3"] = dataset_df["TotRmsAbvGrd"] ** 3
+  dataset_df["Fireplaces-3"] = dataset_df["Fireplaces"] ** 3
+  dataset_df["MasVnrArea-3"] = dataset_df["MasVnrArea"] ** 3
+  dataset_df["BsmtFinSF1-3"] = dataset_df["BsmtFinSF1"] ** 3
+  dataset_df["LotFrontage-3"] = dataset_df["LotFrontage"] ** 3
+  dataset_df["WoodDeckSF-3"] = dataset_df["WoodDeckSF"] ** 3
+  dataset_df["OpenPorchSF-3"] = dataset_df["OpenPorchSF"] ** 3
+  dataset_df["2ndFlrSF-3"] = dataset_df["2ndFlrSF"] ** 3
+
+
+def create_sqrt_features(dataset_df):
+  dataset_df["OverallQual-Sq"] = np.sqrt(dataset_df["OverallQual"])
+  dataset_df["GrLivArea-Sq"] = np.sqrt(dataset_df["GrLivArea"])
+  dataset_df["GarageCars-Sq"] = np.sqrt(dataset_df["GarageCars"])
+  dataset_df["GarageArea-Sq"] = np.sqrt(dataset_df["GarageArea"])
+  dataset_df["TotalBsmtSF-Sq"] = np.sqrt(dataset_df["TotalBsmtSF"])
+  dataset_df["1stFlrSF-Sq"] = np.sqrt(dataset_df["1stFlrSF"])
+  dataset_df["FullBath-Sq"] = np.sqrt(dataset_df["FullBath"])
+  dataset_df["TotRmsAbvGrd-Sq"] = np.sqrt(dataset_df["TotRmsAbvGrd"])
+  dataset_df["Fireplaces-Sq"] = np.sqrt(dataset_df["Fireplaces"])
+  dataset_df["MasVnrArea-Sq"] = np.sqrt(dataset_df["MasVnrArea"])
+  dataset_df["BsmtFinSF1-Sq"] = np.sqrt(dataset_df["BsmtFinSF1"])
+  dataset_df["LotFrontage-Sq"] = np.sqrt(dataset_df["LotFrontage"])
+  dataset_df["WoodDeckSF-Sq"] = np.sqrt(dataset_df["WoodDeckSF"])
+  dataset_df["OpenPorchSF-Sq"] = np.sqrt(dataset_df["OpenPorchSF"])
+  dataset_df["2ndFlrSF-Sq"] = np.sqrt(dataset_df["2ndFlrSF"])
+
+
+def legacy_polynomial_features(dataset_df):
+  create_quadratic_features(dataset_df)
+  create_cubic_features(dataset_df)
+  create_sqrt_features(dataset_df)
+  return dataset_df
+
+
+def memory_of(fn, dataset_df):
+  tracemalloc.start()
+  result_df = fn(dataset_df)
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return (peak, result_df.memory_usage(index=False).sum())
+
+
+def main(sizes):
+  sources = [column for column, _ in POLYNOMIAL_FEATURES]
+  candidates = [
+    ('insertions', lambda df: legacy_polynomial_features(df.copy())),
+    ('float64', lambda df: add_powers(df, POLYNOMIAL_FEATURES)),
+    ('float32', lambda df: add_powers(df, POLYNOMIAL_FEATURES, np.float32)),
+  ]
+  print_row('rows', 'method', 'time (s)', 'peak (MB)', 'frame (MB)')
+  for n_rows in sizes:
+    houses_df = make_houses(n_rows, with_target=False)[sources]\
+                  .fillna(0)
+    for name, fn in candidates:
+      seconds = best_time(lambda: fn(houses_df))
+      peak, frame = memory_of(fn, houses_df)
+      print_row(n_rows, name, '%.4f' % seconds, '%.1f' % (peak / 2 ** 20),
+                '%.1f' % (frame / 2 ** 20))
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
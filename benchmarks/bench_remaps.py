@@ -0,0 +1,63 @@
+# Compares the Series.map(dict) calls that solver used to cluster, flag and
+# rank categories with the compiled lookup tables of features.add_remaps.
+#
+#   python -m benchmarks.bench_remaps [n_rows ...]
+import sys
+
+import numpy as np
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import best_time, print_row
+from features import add_remaps
+from preprocessing import CLUSTER_REMAPS, FLAG_REMAPS, ORDINAL_REMAPS
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+REMAPS = CLUSTER_REMAPS + FLAG_REMAPS + ORDINAL_REMAPS
+
+
+def legacy_remaps(dataset_df):
+  for remap in REMAPS:
+    values = remap.values if remap.labels is None else remap.labels[remap.values]
+    mapping = dict(zip(remap.keys, values.tolist()))
+    dataset_df[remap.name] = dataset_df[remap.column].map(mapping)
+  return dataset_df
+
+
+def compiled_remaps(dataset_df):
+  return add_remaps(dataset_df, REMAPS)
+
+
+# Remapping runs after handle_missing_data, so every value is known and the
+# two agree; unknown values would be NaN for map() and the default here.
+def remapped_columns(n_rows, as_category):
+  houses_df = make_houses(n_rows, with_target=False)
+  houses_df = houses_df[sorted({remap.column for remap in REMAPS})]
+  for column in houses_df:
+    houses_df[column] = houses_df[column].fillna(houses_df[column].mode()[0])
+  if as_category:
+    houses_df = houses_df.astype('category')
+  return houses_df
+
+
+def check_same_remaps(dataset_df):
+  expected = legacy_remaps(dataset_df.copy())
+  actual = compiled_remaps(dataset_df.copy())
+  for remap in REMAPS:
+    assert np.array_equal(np.asarray(expected[remap.name]),
+                          np.asarray(actual[remap.name])), remap.name
+
+
+def main(sizes):
+  check_same_remaps(remapped_columns(2000, as_category=False))
+  print_row('rows', 'dtype', 'map (s)', 'lookup (s)', 'speedup')
+  for n_rows in sizes:
+    for as_category in (False, True):
+      houses_df = remapped_columns(n_rows, as_category)
+      old = best_time(lambda: legacy_remaps(houses_df.copy()))
+      new = best_time(lambda: compiled_remaps(houses_df.copy()))
+      print_row(n_rows, 'category' if as_category else 'str', '%.4f' % old,
+                '%.4f' % new, '%.1fx' % (old / new))
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
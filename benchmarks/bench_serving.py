@@ -0,0 +1,109 @@
+# Load-tests serve.py over a Unix socket: `concurrency` clients each send
+# single-house POST /predict requests back to back on a kept-alive connection
+# for DURATION seconds. Reports latency percentiles and throughput with
+# micro-batching disabled (one request per batch), batching whatever is
+# already queued, and waiting up to 2 ms for a batch to fill.
+#
+#   python -m benchmarks.bench_serving [concurrency ...]
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import print_row
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONCURRENCY = [1, 16, 64]
+DURATION = 5.0
+N_HOUSES = 1000
+# (label, --max-batch-rows, --max-delay-ms)
+SETTINGS = [
+  ('unbatched', 1, 0),
+  ('queued', 256, 0),
+  ('2 ms', 256, 2),
+]
+
+
+def start_server(work_dir, socket_path, max_batch_rows, max_delay_ms):
+  server = subprocess.Popen(
+    [sys.executable, os.path.join(REPO_DIR, 'serve.py'), 'model.artifact',
+     '--unix', socket_path, '--max-batch-rows', str(max_batch_rows),
+     '--max-delay-ms', str(max_delay_ms)],
+    cwd=work_dir, stdout=subprocess.PIPE, text=True)
+  server.stdout.readline()
+  return server
+
+
+def request_bodies(n_houses):
+  houses_df = make_houses(n_houses, seed=1, start_id=100001, with_target=False)
+  records = houses_df.astype(object).where(houses_df.notna(), None)\
+                     .to_dict('records')
+  return [json.dumps(record).encode('utf-8') for record in records]
+
+
+async def client(socket_path, bodies, deadline, latencies):
+  reader, writer = await asyncio.open_unix_connection(socket_path)
+  for body in itertools.cycle(bodies):
+    if time.perf_counter() >= deadline:
+      break
+    start = time.perf_counter()
+    writer.write(b'POST /predict HTTP/1.1\r\nContent-Length: %d\r\n\r\n'
+                 % len(body) + body)
+    await writer.drain()
+    length = 0
+    while True:
+      line = await reader.readline()
+      if line == b'\r\n':
+        break
+      if line.lower().startswith(b'content-length:'):
+        length = int(line.split(b':')[1])
+    await reader.readexactly(length)
+    latencies.append(time.perf_counter() - start)
+  writer.close()
+
+
+async def load_test(socket_path, bodies, concurrency, duration=DURATION):
+  latencies = []
+  start = time.perf_counter()
+  await asyncio.gather(*[
+    client(socket_path, bodies[i::concurrency], start + duration, latencies)
+    for i in range(concurrency)])
+  elapsed = time.perf_counter() - start
+  return (np.array(latencies) * 1000, len(latencies) / elapsed)
+
+
+def main(concurrencies):
+  import solver
+  from artifact import save_artifact
+
+  bodies = request_bodies(N_HOUSES)
+  with tempfile.TemporaryDirectory() as work_dir:
+    preprocessor, X_train, y_train = solver.prepare_data(make_houses(1460))
+    save_artifact(os.path.join(work_dir, 'model.artifact'), preprocessor,
+                  solver.train_model(X_train, y_train))
+    socket_path = os.path.join(work_dir, 'serve.sock')
+
+    print_row('clients', 'batching', 'p50 (ms)', 'p99 (ms)', 'requests/s')
+    for label, max_batch_rows, max_delay_ms in SETTINGS:
+      server = start_server(work_dir, socket_path, max_batch_rows, max_delay_ms)
+      try:
+        asyncio.run(load_test(socket_path, bodies, 1, duration=1))
+        for concurrency in concurrencies:
+          latencies, throughput = asyncio.run(
+            load_test(socket_path, bodies, concurrency))
+          print_row(concurrency, label, '%.2f' % np.percentile(latencies, 50),
+                    '%.2f' % np.percentile(latencies, 99), '%.0f' % throughput)
+      finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_CONCURRENCY)
@@ -0,0 +1,82 @@
+# Compares how long a fresh process takes to produce predictions when it has
+# to retrain (read train.csv, fit the preprocessing, XGBoost selection and the
+# linear model) with loading a saved artifact.
+#
+#   python -m benchmarks.bench_startup [n_train_rows] [n_score_rows]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import best_time, print_row
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RETRAIN_SCRIPT = '''
+import pandas as pd
+import solver
+train_df = pd.read_csv('train.csv')
+batch_df = pd.read_csv('batch.csv')
+preprocessor, X_train, y_train = solver.prepare_data(train_df)
+linear_regression = solver.train_model(X_train, y_train)
+solver.predict(linear_regression, preprocessor.transform(batch_df))
+'''
+
+ARTIFACT_SCRIPT = '''
+import pandas as pd
+from artifact import load_artifact
+batch_df = pd.read_csv('batch.csv')
+preprocessor, model = load_artifact('model.artifact')
+model.predict(preprocessor.transform(batch_df))
+'''
+
+
+def time_process(script, work_dir):
+  env = dict(os.environ, PYTHONPATH=REPO_DIR)
+  start = time.perf_counter()
+  subprocess.run([sys.executable, '-c', script], cwd=work_dir, env=env,
+                 check=True)
+  return time.perf_counter() - start
+
+
+def main(n_train_rows, n_score_rows):
+  import pandas as pd
+  import solver
+  from artifact import load_artifact, save_artifact
+
+  with tempfile.TemporaryDirectory() as work_dir:
+    make_houses(n_train_rows).to_csv(os.path.join(work_dir, 'train.csv'),
+                                     index=False)
+    batch_df = make_houses(n_score_rows, seed=1, with_target=False)
+    batch_df.to_csv(os.path.join(work_dir, 'batch.csv'), index=False)
+
+    train_df = pd.read_csv(os.path.join(work_dir, 'train.csv'))
+    preprocessor, X_train, y_train = solver.prepare_data(train_df)
+    artifact_file = os.path.join(work_dir, 'model.artifact')
+    save_artifact(artifact_file, preprocessor,
+                  solver.train_model(X_train, y_train))
+
+    retrain = time_process(RETRAIN_SCRIPT, work_dir)
+    from_artifact = time_process(ARTIFACT_SCRIPT, work_dir)
+    load = best_time(lambda: load_artifact(artifact_file), repeat=10)
+
+    def load_and_predict():
+      preprocessor, model = load_artifact(artifact_file)
+      model.predict(preprocessor.transform(batch_df))
+    load_predict = best_time(load_and_predict, repeat=10)
+    artifact_size = os.path.getsize(artifact_file)
+
+  print('train rows: %d, scored rows: %d, artifact: %d bytes'
+        % (n_train_rows, n_score_rows, artifact_size))
+  print_row('measure', 'seconds')
+  print_row('retrain proc', '%.3f' % retrain)
+  print_row('artifact proc', '%.3f' % from_artifact)
+  print_row('load only', '%.5f' % load)
+  print_row('load+predict', '%.5f' % load_predict)
+
+
+if __name__ == '__main__':
+  args = [int(arg) for arg in sys.argv[1:]]
+  main(*(args + [1460, 100][len(args):]))
@@ -0,0 +1,71 @@
+# Measures the peak RSS of a scoring process for growing input files, reading
+# the whole file at once and in fixed-size chunks. With chunks the peak should
+# stay flat as the file grows.
+#
+#   python -m benchmarks.bench_streaming [n_rows ...]
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import make_houses
+from benchmarks.timing import print_row
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = [50000, 200000, 800000]
+CHUNK_SIZES = [0, 10000, 50000]
+
+# VmHWM is the peak RSS of this process image in kB (Linux only). Unlike
+# ru_maxrss it does not inherit the peak of the parent that spawned it.
+SCORE_SCRIPT = '''
+import sys
+from artifact import load_artifact
+from score import score_file
+preprocessor, model = load_artifact('model.artifact')
+score_file(preprocessor, model, sys.argv[1], 'predictions.csv', int(sys.argv[2]))
+with open('/proc/self/status') as status:
+  print([line.split()[1] for line in status if line.startswith('VmHWM')][0])
+'''
+
+
+def peak_rss_mb(work_dir, input_file, chunk_rows):
+  env = dict(os.environ, PYTHONPATH=REPO_DIR)
+  output = subprocess.run([sys.executable, '-c', SCORE_SCRIPT, input_file,
+                           str(chunk_rows)],
+                          cwd=work_dir, env=env, check=True,
+                          capture_output=True, text=True).stdout
+  return int(output.split()[-1]) / 1024
+
+
+def write_houses(path, n_rows):
+  written = 0
+  with open(path, 'w', newline='') as f:
+    while written < n_rows:
+      batch = min(100000, n_rows - written)
+      make_houses(batch, seed=written, start_id=written + 1, with_target=False)\
+        .to_csv(f, header=(written == 0), index=False)
+      written += batch
+
+
+def main(sizes):
+  import solver
+  from artifact import save_artifact
+
+  with tempfile.TemporaryDirectory() as work_dir:
+    preprocessor, X_train, y_train = solver.prepare_data(make_houses(1460))
+    save_artifact(os.path.join(work_dir, 'model.artifact'), preprocessor,
+                  solver.train_model(X_train, y_train))
+
+    print_row('rows', 'file (MB)',
+              *['whole file' if not chunk else 'chunk %d' % chunk
+                for chunk in CHUNK_SIZES])
+    for n_rows in sizes:
+      input_file = os.path.join(work_dir, 'houses.csv')
+      write_houses(input_file, n_rows)
+      peaks = [peak_rss_mb(work_dir, input_file, chunk) for chunk in CHUNK_SIZES]
+      print_row(n_rows, '%.0f' % (os.path.getsize(input_file) / 2 ** 20),
+                *['%.0f MB' % peak for peak in peaks])
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,60 @@
+# Compares the per-row f.write loop write_result_csv used to run with the
+# SubmissionWriter formats.
+#
+#   python -m benchmarks.bench_writer [n_rows ...]
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+import submission
+from benchmarks.timing import best_time, print_row
+
+DEFAULT_SIZES = [100000, 1000000]
+START_ID = 1461
+FORMATS = ['csv', 'csv.gz', 'parquet']
+
+
+def legacy_write(filename, y_pred):
+  END_ID = START_ID + len(y_pred)
+  headers = 'Id,SalePrice\n'
+
+  f = open(filename, 'w')
+  f.write(headers)
+  for i in range(START_ID, END_ID):
+    current_house = str(i) + ',' + str(y_pred[i - START_ID]) + '\n'
+    f.write(current_house)
+  f.close()
+
+
+def write_without_pyarrow(filename, ids, y_pred):
+  with open(filename, 'w') as f:
+    f.write(submission.HEADER)
+    f.write(submission.format_csv_rows(ids, y_pred))
+
+
+def main(sizes):
+  rng = np.random.default_rng(0)
+  columns = ['loop csv', 'no-arrow csv'] + FORMATS
+  print_row('rows', *columns)
+  with tempfile.TemporaryDirectory() as work_dir:
+    def path(name):
+      return os.path.join(work_dir, 'submission.' + name)
+
+    for n_rows in sizes:
+      ids = np.arange(START_ID, START_ID + n_rows)
+      y_pred = np.exp(rng.normal(12, 0.4, n_rows))
+      timings = [
+        best_time(lambda: legacy_write(path('loop.csv'), y_pred), repeat=1),
+        best_time(lambda: write_without_pyarrow(path('plain.csv'), ids, y_pred)),
+      ]
+      for name in FORMATS:
+        timings.append(best_time(
+          lambda: submission.write_submission(path(name), ids, y_pred)))
+      print_row(n_rows, *['%.0fk rows/s' % (n_rows / seconds / 1000)
+                          for seconds in timings])
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+
+# Vocabularies of the Kaggle "House Prices" (Ames) string columns, used to
+# generate frames of arbitrary size with the same shape as train.csv/test.csv.
+CATEGORIES = {
+  'MSZoning': ['RL', 'RM', 'FV', 'RH', 'C (all)'],
+  'Street': ['Pave', 'Grvl'],
+  'Alley': ['Grvl', 'Pave'],
+  'LotShape': ['Reg', 'IR1', 'IR2', 'IR3'],
+  'LandContour': ['Lvl', 'Bnk', 'HLS', 'Low'],
+  'Utilities': ['AllPub', 'NoSeWa'],
+  'LotConfig': ['Inside', 'Corner', 'CulDSac', 'FR2', 'FR3'],
+  'LandSlope': ['Gtl', 'Mod', 'Sev'],
+  'Neighborhood': ['NAmes', 'CollgCr', 'OldTown', 'Edwards', 'Somerst',
+                   'Gilbert', 'NridgHt', 'Sawyer', 'NWAmes', 'SawyerW',
+                   'BrkSide', 'Crawfor', 'Mitchel', 'NoRidge', 'Timber',
+                   'IDOTRR', 'ClearCr', 'StoneBr', 'SWISU', 'MeadowV',
+                   'Blmngtn', 'BrDale', 'Veenker', 'NPkVill', 'Blueste'],
+  'Condition1': ['Norm', 'Feedr', 'Artery', 'RRAn', 'PosN', 'RRAe', 'PosA',
+                 'RRNn', 'RRNe'],
+  'Condition2': ['Norm', 'Feedr', 'Artery', 'RRNn', 'PosN', 'PosA', 'RRAn',
+                 'RRAe'],
+  'BldgType': ['1Fam', 'TwnhsE', 'Duplex', 'Twnhs', '2fmCon'],
+  'HouseStyle': ['1Story', '2Story', '1.5Fin', 'SLvl', 'SFoyer', '1.5Unf',
+                 '2.5Unf', '2.5Fin'],
+  'RoofStyle': ['Gable', 'Hip', 'Flat', 'Gambrel', 'Mansard', 'Shed'],
+  'RoofMatl': ['CompShg', 'Tar&Grv', 'WdShngl', 'WdShake', 'Metal',
+               'Membran', 'Roll', 'ClyTile'],
+  'Exterior1st': ['VinylSd', 'HdBoard', 'MetalSd', 'Wd Sdng', 'Plywood',
+                  'CemntBd', 'BrkFace', 'WdShing', 'Stucco', 'AsbShng',
+                  'BrkComm', 'Stone', 'AsphShn', 'ImStucc', 'CBlock'],
+  'Exterior2nd': ['VinylSd', 'MetalSd', 'HdBoard', 'Wd Sdng', 'Plywood',
+                  'CmentBd', 'Wd Shng', 'Stucco', 'BrkFace', 'AsbShng',
+                  'ImStucc', 'Brk Cmn', 'Stone', 'AsphShn', 'Other',
+                  'CBlock'],
+  'MasVnrType': ['None', 'BrkFace', 'Stone', 'BrkCmn'],
+  'ExterQual': ['TA', 'Gd', 'Ex', 'Fa'],
+  'ExterCond': ['TA', 'Gd', 'Fa', 'Ex', 'Po'],
+  'Foundation': ['PConc', 'CBlock', 'BrkTil', 'Slab', 'Stone', 'Wood'],
+  'BsmtQual': ['TA', 'Gd', 'Ex', 'Fa'],
+  'BsmtCond': ['TA', 'Gd', 'Fa', 'Po'],
+  'BsmtExposure': ['No', 'Av', 'Gd', 'Mn'],
+  'BsmtFinType1': ['Unf', 'GLQ', 'ALQ', 'BLQ', 'Rec', 'LwQ'],
+  'BsmtFinType2': ['Unf', 'Rec', 'LwQ', 'BLQ', 'ALQ', 'GLQ'],
+  'Heating': ['GasA', 'GasW', 'Grav', 'Wall', 'OthW', 'Floor'],
+  'HeatingQC': ['Ex', 'TA', 'Gd', 'Fa', 'Po'],
+  'CentralAir': ['Y', 'N'],
+  'Electrical': ['SBrkr', 'FuseA', 'FuseF', 'FuseP', 'Mix'],
+  'KitchenQual': ['TA', 'Gd', 'Ex', 'Fa'],
+  'Functional': ['Typ', 'Min2', 'Min1', 'Mod', 'Maj1', 'Maj2', 'Sev'],
+  'FireplaceQu': ['Gd', 'TA', 'Fa', 'Ex', 'Po'],
+  'GarageType': ['Attchd', 'Detchd', 'BuiltIn', 'Basment', 'CarPort',
+                 '2Types'],
+  'GarageFinish': ['Unf', 'RFn', 'Fin'],
+  'GarageQual': ['TA', 'Fa', 'Gd', 'Ex', 'Po'],
+  'GarageCond': ['TA', 'Fa', 'Gd', 'Po', 'Ex'],
+  'PavedDrive': ['Y', 'N', 'P'],
+  'PoolQC': ['Gd', 'Ex', 'Fa'],
+  'Fence': ['MnPrv', 'GdPrv', 'GdWo', 'MnWw'],
+  'MiscFeature': ['Shed', 'Gar2', 'Othr', 'TenC'],
+  'SaleType': ['WD', 'New', 'COD', 'ConLD', 'ConLI', 'ConLw', 'CWD', 'Oth',
+               'Con'],
+  'SaleCondition': ['Normal', 'Partial', 'Abnorml', 'Family', 'Alloca',
+                    'AdjLand'],
+}
+
+# Share of missing values for the columns that have NaNs in the Kaggle data.
+MISSING_RATES = {
+  'Alley': 0.94, 'PoolQC': 0.99, 'Fence': 0.8, 'MiscFeature': 0.96,
+  'FireplaceQu': 0.47, 'LotFrontage': 0.18, 'GarageType': 0.06,
+  'GarageYrBlt': 0.06, 'GarageFinish': 0.06, 'GarageQual': 0.06,
+  'GarageCond': 0.06, 'BsmtExposure': 0.03, 'BsmtFinType2': 0.03,
+  'BsmtFinType1': 0.03, 'BsmtCond': 0.03, 'BsmtQual': 0.03,
+  'MasVnrArea': 0.01, 'MasVnrType': 0.01, 'Electrical': 0.001,
+}
+
+COLUMNS = ['Id', 'MSSubClass', 'MSZoning', 'LotFrontage', 'LotArea', 'Street',
+           'Alley', 'LotShape', 'LandContour', 'Utilities', 'LotConfig',
+           'LandSlope', 'Neighborhood', 'Condition1', 'Condition2',
+           'BldgType', 'HouseStyle', 'OverallQual', 'OverallCond',
+           'YearBuilt', 'YearRemodAdd', 'RoofStyle', 'RoofMatl',
+           'Exterior1st', 'Exterior2nd', 'MasVnrType', 'MasVnrArea',
+           'ExterQual', 'ExterCond', 'Foundation', 'BsmtQual', 'BsmtCond',
+           'BsmtExposure', 'BsmtFinType1', 'BsmtFinSF1', 'BsmtFinType2',
+           'BsmtFinSF2', 'BsmtUnfSF', 'TotalBsmtSF', 'Heating', 'HeatingQC',
+           'CentralAir', 'Electrical', '1stFlrSF', '2ndFlrSF',
+           'LowQualFinSF', 'GrLivArea', 'BsmtFullBath', 'BsmtHalfBath',
+           'FullBath', 'HalfBath', 'BedroomAbvGr', 'KitchenAbvGr',
+           'KitchenQual', 'TotRmsAbvGrd', 'Functional', 'Fireplaces',
+           'FireplaceQu', 'GarageType', 'GarageYrBlt', 'GarageFinish',
+           'GarageCars', 'GarageArea', 'GarageQual', 'GarageCond',
+           'PavedDrive', 'WoodDeckSF', 'OpenPorchSF', 'EnclosedPorch',
+           '3SsnPorch', 'ScreenPorch', 'PoolArea', 'PoolQC', 'Fence',
+           'MiscFeature', 'MiscVal', 'MoSold', 'YrSold', 'SaleType',
+           'SaleCondition']
+
+
+def sparse_area(rng, n_rows, share, high):
+  return np.where(rng.random(n_rows) < share,
+                  rng.integers(1, high, n_rows), 0)
+
+
+def make_houses(n_rows, seed=0, start_id=1, with_target=True):
+  rng = np.random.default_rng(seed)
+  data = {name: rng.choice(values, n_rows)
+          for name, values in CATEGORIES.items()}
+
+  first_floor = rng.integers(400, 2500, n_rows)
+  second_floor = sparse_area(rng, n_rows, 0.45, 1600)
+  low_qual = sparse_area(rng, n_rows, 0.02, 500)
+  bsmt_fin1 = rng.integers(0, 2200, n_rows)
+  bsmt_fin2 = sparse_area(rng, n_rows, 0.1, 1000)
+  bsmt_unf = rng.integers(0, 2000, n_rows)
+  year_built = rng.integers(1872, 2011, n_rows)
+
+  data.update({
+    'Id': np.arange(start_id, start_id + n_rows),
+    'MSSubClass': rng.choice([20, 30, 40, 45, 50, 60, 70, 75, 80, 85, 90,
+                              120, 150, 160, 180, 190], n_rows),
+    'LotFrontage': rng.integers(21, 200, n_rows).astype(float),
+    'LotArea': rng.integers(1300, 40000, n_rows),
+    'OverallQual': rng.integers(1, 11, n_rows),
+    'OverallCond': rng.integers(1, 10, n_rows),
+    'YearBuilt': year_built,
+    'YearRemodAdd': np.maximum(year_built, rng.integers(1950, 2011, n_rows)),
+    'MasVnrArea': sparse_area(rng, n_rows, 0.4, 1000).astype(float),
+    'BsmtFinSF1': bsmt_fin1,
+    'BsmtFinSF2': bsmt_fin2,
+    'BsmtUnfSF': bsmt_unf,
+    'TotalBsmtSF': bsmt_fin1 + bsmt_fin2 + bsmt_unf,
+    '1stFlrSF': first_floor,
+    '2ndFlrSF': second_floor,
+    'LowQualFinSF': low_qual,
+    'GrLivArea': first_floor + second_floor + low_qual,
+    'BsmtFullBath': rng.integers(0, 3, n_rows),
+    'BsmtHalfBath': rng.integers(0, 2, n_rows),
+    'FullBath': rng.integers(0, 4, n_rows),
+    'HalfBath': rng.integers(0, 3, n_rows),
+    'BedroomAbvGr': rng.integers(0, 7, n_rows),
+    'KitchenAbvGr': rng.integers(0, 3, n_rows),
+    'TotRmsAbvGrd': rng.integers(2, 15, n_rows),
+    'Fireplaces': rng.integers(0, 4, n_rows),
+    'GarageYrBlt': np.maximum(year_built,
+                              rng.integers(1900, 2011, n_rows)).astype(float),
+    'GarageCars': rng.integers(0, 5, n_rows),
+    'GarageArea': rng.integers(0, 1400, n_rows),
+    'WoodDeckSF': sparse_area(rng, n_rows, 0.5, 850),
+    'OpenPorchSF': sparse_area(rng, n_rows, 0.55, 550),
+    'EnclosedPorch': sparse_area(rng, n_rows, 0.15, 550),
+    '3SsnPorch': sparse_area(rng, n_rows, 0.02, 500),
+    'ScreenPorch': sparse_area(rng, n_rows, 0.08, 480),
+    'PoolArea': sparse_area(rng, n_rows, 0.005, 740),
+    'MiscVal': sparse_area(rng, n_rows, 0.04, 15000),
+    'MoSold': rng.integers(1, 13, n_rows),
+    'YrSold': rng.integers(2006, 2011, n_rows),
+  })
+
+  houses_df = pd.DataFrame(data, columns=COLUMNS)
+  for column, rate in MISSING_RATES.items():
+    houses_df[column] = houses_df[column].mask(rng.random(n_rows) < rate)
+
+  if with_target:
+    log_price = (10.5 + 0.1 * houses_df['OverallQual']
+                 + 0.0004 * houses_df['GrLivArea']
+                 + 0.002 * (houses_df['YearBuilt'] - 1870)
+                 + rng.normal(0, 0.15, n_rows))
+    houses_df['SalePrice'] = np.expm1(log_price).round()
+  return houses_df
@@ -0,0 +1,14 @@
+import time
+
+
+def best_time(fn, repeat=3):
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    fn()
+    best = min(best, time.perf_counter() - start)
+  return best
+
+
+def print_row(*cells):
+  print('  '.join(str(cell).rjust(14) for cell in cells))
@@ -0,0 +1,111 @@
+# Checks that a house's price does not depend on the other houses scored with
+# it: scoring a CSV with a saved artifact must give the same predictions
+# whatever the chunk size, and scoring houses given as dicts, as serve.py
+# does, the same predictions in one batch as one house at a time.
+#
+#   python check_scoring.py model.artifact test.csv [--chunk-rows N ...]
+#                           [--records N] [--blank FRACTION]
+#
+# --blank first empties that fraction of the cells of every column but Id,
+# so that chunks differ in which columns have missing values. The dicts are
+# the first --records houses of the file, without their empty fields.
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from artifact import load_artifact
+from score import score_file, score_records
+
+CHUNK_ROWS = [0, 1000, 100, 7]
+N_RECORDS = 100
+BLANK_FRACTION = 0.01
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('artifact_file')
+  parser.add_argument('input_file')
+  parser.add_argument('--chunk-rows', type=int, nargs='+', default=CHUNK_ROWS,
+                      help='chunk sizes to compare, 0 reads the whole file')
+  parser.add_argument('--records', type=int, default=N_RECORDS,
+                      help='houses scored as one batch and one at a time')
+  parser.add_argument('--blank', type=float, default=BLANK_FRACTION,
+                      metavar='FRACTION',
+                      help='fraction of the cells to empty first')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+
+  preprocessor, model = load_artifact(args.artifact_file)
+  with tempfile.TemporaryDirectory() as work_dir:
+    input_file = args.input_file
+    if args.blank:
+      input_file = os.path.join(work_dir, 'blanked.csv')
+      blank_cells(args.input_file, input_file, args.blank, args.seed)
+    ok = check_chunk_sizes(preprocessor, model, input_file, args.chunk_rows,
+                           work_dir)
+    records = read_as_records(input_file, args.records)
+    ok = check_batches(preprocessor, model, records) and ok
+  raise SystemExit(0 if ok else 1)
+
+
+def blank_cells(input_file, output_file, fraction, seed=0):
+  houses_df = pd.read_csv(input_file, dtype=str, keep_default_na=False)
+  blank = np.random.default_rng(seed).random(houses_df.shape) < fraction
+  blank[:, houses_df.columns.get_loc('Id')] = False
+  houses_df.mask(blank, '').to_csv(output_file, index=False)
+
+
+def check_chunk_sizes(preprocessor, model, input_file, chunk_sizes, work_dir):
+  predictions = {}
+  for chunk_rows in chunk_sizes:
+    output_file = os.path.join(work_dir, 'chunks_%d.csv' % chunk_rows)
+    score_file(preprocessor, model, input_file, output_file, chunk_rows)
+    predictions[chunk_rows] = pd.read_csv(output_file)['SalePrice'].to_numpy()
+
+  reference_rows, reference = chunk_sizes[0], predictions[chunk_sizes[0]]
+  ok = True
+  for chunk_rows, y_pred in predictions.items():
+    differ = ~same_predictions(y_pred, reference)
+    print('chunks of %s rows: %d of %d predictions differ from %s'
+          % (chunk_rows or 'all', differ.sum(), len(y_pred),
+             'all rows' if not reference_rows else '%d rows' % reference_rows))
+    ok = ok and not differ.any()
+  return ok
+
+
+# Equal, or both missing.
+def same_predictions(y_pred, reference):
+  return (y_pred == reference) | (np.isnan(y_pred) & np.isnan(reference))
+
+
+def read_as_records(input_file, n_records):
+  houses_df = pd.read_csv(input_file, nrows=n_records)
+  return [{field: value for field, value in house.items() if value == value}
+          for house in houses_df.astype(object).to_dict('records')]
+
+
+# Houses that cannot be priced, for lack of a field imputation does not fill,
+# are left out: score_records rejects any batch holding one.
+def check_batches(preprocessor, model, records):
+  alone = []
+  for record in records:
+    try:
+      alone.append((record, score_records(preprocessor, model, [record])))
+    except ValueError:
+      pass
+  n_unpriced = len(records) - len(alone)
+  records = [record for record, _ in alone]
+  alone_ids = np.concatenate([house_ids for _, (house_ids, _) in alone])
+  alone_pred = np.concatenate([house_pred for _, (_, house_pred) in alone])
+  ids, y_pred = score_records(preprocessor, model, records)
+  differ = ~same_predictions(y_pred, alone_pred) | (ids != alone_ids)
+  print('one batch: %d of %d predictions differ from one house at a time '
+        '(%d houses without a price left out)'
+        % (differ.sum(), len(records), n_unpriced))
+  return not differ.any()
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,165 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from artifact import LinearModel
+
+# Rows of X standardized into float64 at a time when accumulating X^T X.
+CHUNK_ROWS = 16384
+
+# Data shared by every fold, set once per worker process by the pool
+# initializer instead of being pickled again for each fold.
+fold_data = {}
+
+
+def set_fold_data(data):
+  fold_data.clear()
+  fold_data.update(data)
+
+
+def make_folds(n_rows, n_folds):
+  # Same contiguous, unshuffled folds as sklearn's KFold.
+  return np.array_split(np.arange(n_rows), n_folds)
+
+
+# Processes run_folds() uses for `n_folds` folds: one per core by default.
+def fold_workers(n_jobs, n_folds):
+  if n_jobs is None:
+    n_jobs = os.cpu_count()
+  return min(n_jobs, n_folds)
+
+
+def run_folds(fit_fold, folds, data, n_jobs=None):
+  n_jobs = fold_workers(n_jobs, len(folds))
+  if n_jobs == 1:
+    set_fold_data(data)
+    return [fit_fold(test_idx) for test_idx in folds]
+  with ProcessPoolExecutor(n_jobs, initializer=set_fold_data,
+                           initargs=(data,)) as pool:
+    return list(pool.map(fit_fold, folds))
+
+
+# Least squares on [X, 1], with the columns of X standardized first. This is
+# only a reparametrization of the linear model, so predictions are the same
+# as LinearRegression's, but it keeps the Gram matrix well scaled.
+def make_design(X, center, scale):
+  X = np.asarray(X, dtype=np.float64)
+  return np.column_stack([(X - center) / scale, np.ones(X.shape[0])])
+
+
+def standardization_of(X):
+  X = np.asarray(X)
+  center = X.mean(axis=0, dtype=np.float64)
+  scale = X.std(axis=0, dtype=np.float64)
+  scale[scale == 0] = 1
+  return (center, scale)
+
+
+# design^T design and design^T y, accumulated in float64 over chunks of rows,
+# so a float32 X is never converted whole. With a boolean `columns`, the
+# design is built from those columns of X only, picked a chunk at a time.
+def design_products(X, y, center, scale, chunk_rows=CHUNK_ROWS, columns=None):
+  width = len(center) + 1
+  gram = np.zeros((width, width))
+  moment = np.zeros(width)
+  for start in range(0, X.shape[0], chunk_rows):
+    chunk = X[start:start + chunk_rows]
+    if columns is not None:
+      chunk = chunk[:, columns]
+    design = make_design(chunk, center, scale)
+    gram += design.T @ design
+    moment += design.T @ y[start:start + chunk_rows]
+  return (gram, moment)
+
+
+# Minimum-norm solution of the normal equations, like lstsq on the design
+# matrix itself; training error follows from the sums without another pass.
+# `penalty`, if given, is added to the diagonal of the Gram matrix (ridge);
+# the training error is still the squared error alone.
+def solve_normal_equations(gram, moment, y_sq_sum, penalty=None):
+  lhs = gram if penalty is None else gram + np.diag(penalty)
+  coef = np.linalg.lstsq(lhs, moment, rcond=None)[0]
+  train_sse = y_sq_sum - 2 * coef @ moment + coef @ gram @ coef
+  return (coef, max(train_sse, 0) / gram[-1, -1])
+
+
+def fit_gram_fold(test_idx):
+  test_design = make_design(fold_data['X'][test_idx], fold_data['center'],
+                            fold_data['scale'])
+  test_y = fold_data['y'][test_idx]
+  gram = fold_data['gram'] - test_design.T @ test_design
+  moment = fold_data['moment'] - test_design.T @ test_y
+  y_sq_sum = fold_data['y_sq_sum'] - test_y @ test_y
+  coef, train_mse = solve_normal_equations(gram, moment, y_sq_sum)
+  test_mse = np.mean((test_design @ coef - test_y) ** 2)
+  return (train_mse, test_mse)
+
+
+# k-fold CV of ordinary least squares on an already prepared matrix. X^T X is
+# computed once and each fold only subtracts its held-out rows from it.
+# Returns the train and test RMSE of every fold.
+def cross_validate_linear(X, y, n_folds=10, n_jobs=None):
+  X = np.asarray(X)
+  y = np.asarray(y, dtype=np.float64)
+  y = y - y.mean()
+  center, scale = standardization_of(X)
+  gram, moment = design_products(X, y, center, scale)
+  data = {
+    'X': X,
+    'y': y,
+    'center': center,
+    'scale': scale,
+    'gram': gram,
+    'moment': moment,
+    'y_sq_sum': y @ y,
+  }
+  scores = run_folds(fit_gram_fold, make_folds(len(y), n_folds), data, n_jobs)
+  return tuple(np.sqrt(np.array(scores)).T)
+
+
+# Least squares of y on X plus an intercept, solved on the standardized design
+# and mapped back to a model on the original columns of X.
+def fit_linear(X, y):
+  X = np.asarray(X)
+  y = np.asarray(y, dtype=np.float64)
+  offset = y.mean()
+  center, scale = standardization_of(X)
+  gram, moment = design_products(X, y - offset, center, scale)
+  return solve_linear(gram, moment, center, scale, offset)
+
+
+# The model on the original scale from the normal equations of the design
+# standardized by `center` and `scale`, with the target centered by `offset`.
+def solve_linear(gram, moment, center, scale, offset):
+  coef = np.linalg.lstsq(gram, moment, rcond=None)[0]
+  weights = coef[:-1] / scale
+  return LinearModel(weights, coef[-1] + offset - center @ weights)
+
+
+def fit_pipeline_fold(test_idx):
+  train_df = fold_data['train_df']
+  y = fold_data['y']
+  train_mask = np.ones(len(y), dtype=bool)
+  train_mask[test_idx] = False
+
+  _, X_train, X_test = fold_data['fit_features'](train_df[train_mask],
+                                                 y[train_mask],
+                                                 train_df.iloc[test_idx])
+  y_train = np.asarray(y[train_mask], dtype=np.float64)
+  y_test = np.asarray(y.iloc[test_idx], dtype=np.float64)
+  model = fit_linear(X_train, y_train)
+  return (np.mean((model.predict(X_train) - y_train) ** 2),
+          np.mean((model.predict(X_test) - y_test) ** 2))
+
+
+# k-fold CV where everything learned from data (imputation statistics,
+# one-hot vocabularies, feature selection) is refitted on each training fold
+# by fit_features(train_df, y_train, test_df) -> (preprocessor, X_train,
+# X_test), so the test fold never influences the features it is scored with.
+def cross_validate_pipeline(train_df, y, fit_features, n_folds=10,
+                            n_jobs=None):
+  data = {'train_df': train_df, 'y': y, 'fit_features': fit_features}
+  scores = run_folds(fit_pipeline_fold, make_folds(len(y), n_folds), data,
+                     n_jobs)
+  return tuple(np.sqrt(np.array(scores)).T)
@@ -1,67 +1,163 @@
+# Plots SalePrice against the porch areas and a heatmap of the features most
+# correlated with it.
+#
+#   python data_exploration.py [--fast] [--sample N] [--output DIR]
+#
+# --fast plots a random sample of rows as hexbin densities with a least-squares
+# line, instead of a scatter of every row with a bootstrapped confidence band.
+# With --output the figures are written to DIR as PNG files, without a
+# display.
+import argparse
+import os
+
+import numpy as np
 import pandas as pd
 
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from scipy.stats.stats import pearsonr
+from scipy import stats
 
+from loading import read_houses
+from preprocessing import TARGET
 
-# TODO: think of a way to refactor this function, which is a duplication
-# of acquire_data() function in solver.py
-def acquire_data():
-  TARGET = 'SalePrice'
-  global train_df, test_df, target_col
+PORCH_FEATURES = ['OpenPorchSF', 'EnclosedPorch', '3SsnPorch', 'ScreenPorch']
+FAST_SAMPLE_ROWS = 50000
+TOP_CORRELATIONS = 10
+
+
+def main():
+  args = parse_args()
+  if args.output:
+    plt.switch_backend('Agg')
+    os.makedirs(args.output, exist_ok=True)
+  sample_rows = args.sample
+  if sample_rows is None and args.fast:
+    sample_rows = FAST_SAMPLE_ROWS
+
+  train_df, target_col = acquire_data()
+  train_df, target_col = sample(train_df, target_col, sample_rows, args.seed)
+  correlations = target_correlations(train_df, target_col)
+  understand_data(train_df, target_col, correlations, args.fast)
+  show_or_save(args.output, 'porch_features.png')
+  plot_top_corr_heatmap(train_df, target_col, correlations)
+  show_or_save(args.output, 'top_correlations.png')
 
-  train_df = pd.read_csv('train.csv', header=0)
-  test_df = pd.read_csv('test.csv', header=0)
+
+def parse_args():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--fast', action='store_true',
+                      help='hexbin densities of a sample of rows instead of '
+                           'bootstrapped regression plots of every row')
+  parser.add_argument('--sample', type=int, metavar='N',
+                      help='rows to explore (default: all, or %d with --fast)'
+                           % FAST_SAMPLE_ROWS)
+  parser.add_argument('--seed', type=int, default=0,
+                      help='random seed of the row sample')
+  parser.add_argument('--output', metavar='DIR',
+                      help='write the figures to this directory instead of '
+                           'showing them')
+  return parser.parse_args()
+
+
+def acquire_data():
+  train_df = read_houses('train.csv')
   target_col = train_df[TARGET]
   train_df = train_df.drop([TARGET], axis=1)
+  return (train_df, target_col)
+
 
+def sample(train_df, target_col, n_rows, seed=0):
+  if not n_rows or n_rows >= len(train_df):
+    return (train_df, target_col)
+  rows = np.sort(np.random.default_rng(seed).choice(len(train_df), n_rows,
+                                                    replace=False))
+  return (train_df.iloc[rows], target_col.iloc[rows])
 
-def understand_data():
+
+# Pearson correlation, two-sided p-value (as scipy.stats.pearsonr) and number
+# of rows of every numeric column with the target alone, over the rows where
+# both are present as DataFrame.corr() pairs them. All columns are handled by
+# the same array operations instead of one correlation per pair of columns.
+def target_correlations(train_df, target_col):
+  numeric_df = train_df.select_dtypes('number')
+  X = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+  y = target_col.to_numpy(dtype=np.float64, na_value=np.nan)[:, np.newaxis]
+  present = ~np.isnan(X) & ~np.isnan(y)
+  n_rows = present.sum(axis=0)
+  with np.errstate(invalid='ignore', divide='ignore'):
+    x_dev = deviations(X, present, n_rows)
+    y_dev = deviations(y, present, n_rows)
+    corr = (x_dev * y_dev).sum(axis=0)\
+           / np.sqrt((x_dev ** 2).sum(axis=0) * (y_dev ** 2).sum(axis=0))
+    corr = np.clip(corr, -1, 1)
+    t = corr * np.sqrt((n_rows - 2) / (1 - corr ** 2))
+  p_value = 2 * stats.t.sf(np.abs(t), n_rows - 2)
+  return pd.DataFrame({'corr': corr, 'p_value': p_value, 'n_rows': n_rows},
+                      index=numeric_df.columns)
+
+
+# Deviations from the mean of each column over its `present` rows, 0 elsewhere.
+def deviations(values, present, n_rows):
+  values = np.where(present, values, 0)
+  return np.where(present, values - values.sum(axis=0) / n_rows, 0)
+
+
+def understand_data(train_df, target_col, correlations, fast=False):
   grid = plt.GridSpec(2, 2)
-  plt.subplots(figsize =(30, 15))
-  plt.subplot(grid[0, 0])
-  g1 = sns.regplot(x=train_df['OpenPorchSF'], y=target_col, 
-      fit_reg=True, 
-      label = "corr: %2f, p-value: %2f"%(pearsonr(train_df['OpenPorchSF'], target_col)))
-  g1 = g1.legend(loc="best")
-
-  plt.subplot(grid[0, 1])
-  g2 = sns.regplot(x=train_df['EnclosedPorch'], y=target_col, 
-      fit_reg=True, 
-      label = "corr: %2f, p-value: %2f"%(pearsonr(train_df['EnclosedPorch'], target_col)))
-  g2 = g2.legend(loc="best")                  
-  
-  plt.subplot(grid[1,0])
-  g3 = sns.regplot(x=train_df['3SsnPorch'], y=target_col, 
-      fit_reg=True, 
-      label = "corr: %2f, p-value: %2f"%(pearsonr(train_df['3SsnPorch'], target_col)))
-  g3 = g3.legend(loc="best")                  
-  
-  plt.subplot(grid[1,1])
-  g3 = sns.regplot(x=train_df['ScreenPorch'], y=target_col, 
-      fit_reg=True, 
-      label = "corr: %2f, p-value: %2f"%(pearsonr(train_df['ScreenPorch'], target_col)))
-  g3 = g3.legend(loc="best")                  
-  
-  
-  
-  plt.show()  
-
-
-
-
-def plot_top_corr_heatmap():
-  corr_matrix = train_df.corr(method='pearson')
-  cols = corr_matrix.nlargest(10, 'SalePrice').index
-  largest_corr_matrix = np.corrcoef(train_df[cols].values.T)
-  sns.heatmap(largest_corr_matrix, cbar=True, annot=True, 
-              square=True, fmt='.2f', annot_kws={'size': 10}, 
+  plt.figure(figsize=(30, 15))
+  for i, feature in enumerate(PORCH_FEATURES):
+    plt.subplot(grid[i // 2, i % 2])
+    label = "corr: %2f, p-value: %2f" % tuple(
+      correlations.loc[feature, ['corr', 'p_value']])
+    if fast:
+      g = hexbin_plot(train_df[feature], target_col, label)
+    else:
+      g = sns.regplot(x=train_df[feature], y=target_col, fit_reg=True,
+                      label=label)
+    g.legend(loc="best")
+
+
+# Row density in hexagonal bins, on a log scale, and the least-squares line:
+# drawing cost depends on the number of bins rather than rows, and no
+# confidence band is bootstrapped.
+def hexbin_plot(x, y, label):
+  present = x.notna().to_numpy() & y.notna().to_numpy()
+  ax = plt.gca()
+  ax.set_xlabel(x.name)
+  ax.set_ylabel(y.name)
+  x = x.to_numpy(dtype=np.float64, na_value=np.nan)[present]
+  y = y.to_numpy(dtype=np.float64, na_value=np.nan)[present]
+  hexagons = ax.hexbin(x, y, gridsize=50, bins='log', mincnt=1, cmap='Blues')
+  if np.ptp(x) == 0:
+    hexagons.set_label(label)
+    return ax
+  slope, intercept = np.polyfit(x, y, 1)
+  ends = np.array([x.min(), x.max()])
+  ax.plot(ends, slope * ends + intercept, color='C1', label=label)
+  return ax
+
+
+# The columns are picked from their correlation with the target alone; only
+# the TOP_CORRELATIONS x TOP_CORRELATIONS matrix among them is computed.
+def plot_top_corr_heatmap(train_df, target_col, correlations):
+  top = correlations['corr'].nlargest(TOP_CORRELATIONS - 1).index
+  cols = pd.Index([TARGET]).append(top)
+  largest_corr_matrix = train_df[top].assign(**{TARGET: target_col})[cols]\
+                                     .corr(method='pearson').to_numpy()
+  plt.figure(figsize=(10, 10))
+  sns.heatmap(largest_corr_matrix, cbar=True, annot=True,
+              square=True, fmt='.2f', annot_kws={'size': 10},
               yticklabels=cols.values, xticklabels=cols.values)
-  plt.show()
 
 
+def show_or_save(output_dir, file_name):
+  if output_dir:
+    plt.savefig(os.path.join(output_dir, file_name), bbox_inches='tight')
+    plt.close('all')
+  else:
+    plt.show()
+
 
-acquire_data()
-understand_data()
\ No newline at end of file
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from profiling import profiled
+
+CHUNK_ROWS = 16384
+
+
+# Codes of `series` in the fixed list `categories`, -1 for missing or unknown
+# values. Factorizing first means only the distinct values are looked up; a
+# category column already holds codes into its own categories.
+def category_codes(series, categories):
+  if isinstance(series.dtype, pd.CategoricalDtype):
+    codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+  else:
+    codes, uniques = pd.factorize(series)
+  lookup = pd.Index(categories).get_indexer(uniques)
+  return np.append(lookup, -1)[codes]
+
+
+# One-hot encodes several columns at once into a single preallocated block.
+# The categories of every column are fixed by fit(), so any batch transformed
+# afterwards gets exactly the same output columns; unseen and missing values
+# encode as all zeros, like pd.get_dummies does for NaN.
+class OneHotEncoder:
+
+  def __init__(self, columns, dtype=np.uint8):
+    self.columns = list(columns)
+    self.dtype = dtype
+    self.categories = None
+
+  def fit(self, dataset_df):
+    self.categories = {column: sorted(dataset_df[column].dropna().unique().tolist())
+                       for column in self.columns}
+    return self
+
+  @property
+  def feature_names(self):
+    return ['%s_%s' % (column, value)
+            for column in self.columns for value in self.categories[column]]
+
+  @profiled
+  def transform(self, dataset_df, sparse=False):
+    block = self.encode(dataset_df, sparse)
+    if sparse:
+      encoded_df = pd.DataFrame.sparse.from_spmatrix(block, index=dataset_df.index,
+                                                     columns=self.feature_names)
+    else:
+      encoded_df = pd.DataFrame(block, index=dataset_df.index,
+                                columns=self.feature_names, copy=False)
+    return pd.concat([dataset_df.drop(self.columns, axis=1), encoded_df], axis=1)
+
+  # Names of the columns transform() outputs: the other columns of
+  # `dataset_df` followed by the one-hot features.
+  def output_columns(self, dataset_df):
+    return dataset_df.columns.drop(self.columns)\
+                     .append(pd.Index(self.feature_names))
+
+  # Writes the one-hot features into the columns `positions` of `out`, one
+  # position per feature name and -1 for features to leave out. Columns with
+  # no kept feature are not even looked up.
+  def encode_into(self, dataset_df, out, positions):
+    zero_columns(out, positions[positions >= 0])
+    rows = np.arange(out.shape[0])
+    offset = 0
+    for column in self.columns:
+      width = len(self.categories[column])
+      column_positions = positions[offset:offset + width]
+      offset += width
+      if (column_positions < 0).all():
+        continue
+      codes = category_codes(dataset_df[column], self.categories[column])
+      targets = np.append(column_positions, -1)[codes]
+      present = targets >= 0
+      out[rows[present], targets[present]] = 1
+    return out
+
+  def encode(self, dataset_df, sparse=False):
+    n_rows = dataset_df.shape[0]
+    codes = [category_codes(dataset_df[column], self.categories[column])
+             for column in self.columns]
+    widths = [len(self.categories[column]) for column in self.columns]
+    offsets = np.cumsum([0] + widths)
+    if sparse:
+      return encode_sparse(codes, offsets, n_rows, self.dtype)
+    return encode_dense(codes, offsets, n_rows, self.dtype)
+
+
+# The kept one-hot features usually sit next to each other at the end of the
+# matrix, where one strided slice assignment zeroes them far faster than
+# indexing every column.
+def zero_columns(out, positions):
+  if len(positions) and (np.diff(positions) == 1).all():
+    out[:, positions[0]:positions[-1] + 1] = 0
+  else:
+    out[:, positions] = 0
+
+
+# Rows are filled a chunk at a time so that the slice of the output being
+# written stays in cache while every column is scattered into it.
+def encode_dense(codes, offsets, n_rows, dtype):
+  width = offsets[-1]
+  block = np.zeros((n_rows, width), dtype=dtype)
+  flat = block.reshape(-1)
+  for start in range(0, n_rows, CHUNK_ROWS):
+    stop = min(start + CHUNK_ROWS, n_rows)
+    row_starts = np.arange(start, stop) * width
+    for column_codes, offset in zip(codes, offsets):
+      chunk_codes = column_codes[start:stop]
+      present = chunk_codes >= 0
+      flat[row_starts[present] + offset + chunk_codes[present]] = 1
+  return block
+
+
+# Every column contributes at most one non-zero per row, already in column
+# order, so the CSR arrays are built directly instead of sorting COO input.
+def encode_sparse(codes, offsets, n_rows, dtype):
+  indices = np.empty((n_rows, len(codes)), dtype=np.int32)
+  for i, (column_codes, offset) in enumerate(zip(codes, offsets)):
+    indices[:, i] = np.where(column_codes >= 0, column_codes + offset, -1)
+  present = indices >= 0
+  indptr = np.zeros(n_rows + 1, dtype=np.int32)
+  np.cumsum(present.sum(axis=1), out=indptr[1:])
+  indices = indices[present]
+  data = np.ones(len(indices), dtype=dtype)
+  return sp.csr_matrix((data, indices, indptr), shape=(n_rows, offsets[-1]))
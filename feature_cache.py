@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 64 * 2 ** 20
+
+
+# Hash of everything a fitted model depends on: the columns of X (names,
+# dtypes and raw values), y and the fitting parameters.
+def fingerprint(X, y, params):
+  digest = hashlib.blake2b(digest_size=16)
+  digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+  if hasattr(X, 'columns'):
+    columns = [(str(name), X[name].to_numpy()) for name in X.columns]
+  else:
+    X = np.asarray(X)
+    columns = [(str(i), X[:, i]) for i in range(X.shape[1])]
+  for name, values in columns + [('__y__', np.asarray(y))]:
+    values = np.ascontiguousarray(values)
+    digest.update(('%s:%s:%d;' % (name, values.dtype.str, len(values)))
+                  .encode('utf-8'))
+    digest.update(values.tobytes())
+  return digest.hexdigest()
+
+
+# On-disk store of arrays keyed by fingerprint, one .npy file per key. Reads
+# refresh a file's modification time, and writes evict the least recently
+# used files until the directory fits in max_bytes. Files are written under a
+# temporary name and renamed, so concurrent processes can share a directory.
+class ArrayCache:
+
+  def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+    self.directory = directory
+    self.max_bytes = max_bytes
+
+  def path_of(self, key):
+    return os.path.join(self.directory, key + '.npy')
+
+  def get(self, key):
+    path = self.path_of(key)
+    try:
+      array = np.load(path)
+      os.utime(path)
+    except (FileNotFoundError, ValueError):
+      return None
+    return array
+
+  def put(self, key, array):
+    os.makedirs(self.directory, exist_ok=True)
+    temp_path = '%s.%d.tmp' % (self.path_of(key), os.getpid())
+    with open(temp_path, 'wb') as f:
+      np.save(f, array)
+    os.replace(temp_path, self.path_of(key))
+    self.evict()
+
+  def evict(self):
+    entries = []
+    for entry in os.scandir(self.directory):
+      if entry.name.endswith('.npy'):
+        try:
+          stat = entry.stat()
+        except FileNotFoundError:
+          continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+      if total <= self.max_bytes:
+        break
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+      total -= size
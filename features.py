@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from collections import namedtuple
+
+from encoding import category_codes
+
+
+# A flag is a 0/1 column computed by comparing `column` with `operand`, which
+# is either a literal value or another column wrapped in Column().
+Flag = namedtuple('Flag', ['name', 'column', 'op', 'operand'])
+Column = namedtuple('Column', ['name'])
+
+# Column name suffix of each power, e.g. GrLivArea-2 or GrLivArea-Sq.
+POWER_SUFFIXES = {2: '2', 3: '3', 0.5: 'Sq'}
+
+COMPARISONS = {
+  'eq': np.equal,
+  'ne': np.not_equal,
+  'lt': np.less,
+  'le': np.less_equal,
+  'gt': np.greater,
+  'ge': np.greater_equal,
+}
+
+
+def resolve_operand(dataset_df, operand):
+  if isinstance(operand, Column):
+    return dataset_df[operand.name].to_numpy()
+  return operand
+
+
+def compute_flag(dataset_df, flag):
+  left = dataset_df[flag.column].to_numpy()
+  right = resolve_operand(dataset_df, flag.operand)
+  return COMPARISONS[flag.op](left, right).astype(np.int8)
+
+
+def add_flags(dataset_df, flags):
+  for flag in flags:
+    dataset_df[flag.name] = compute_flag(dataset_df, flag)
+  return dataset_df
+
+
+# A remap replaces the values of `column` through a dict compiled into a
+# lookup table: `keys` gives every known value a code, and `values[code]` is
+# its replacement. The extra last entry of `values` is the default, taken by
+# missing values and by values the dict does not know. Text replacements are
+# stored as codes into `labels` and come out as a category column.
+Remap = namedtuple('Remap', ['name', 'column', 'keys', 'values', 'labels'])
+
+
+def compile_remap(column, mapping, default, name=None):
+  values = np.array(list(mapping.values()) + [default])
+  labels = None
+  if values.dtype.kind == 'U':
+    labels, values = np.unique(values, return_inverse=True)
+  if values.dtype.kind == 'i' and -128 <= values.min() and values.max() < 128:
+    values = values.astype(np.int8)
+  return Remap(name or column, column, list(mapping), values, labels)
+
+
+def add_remaps(dataset_df, remaps):
+  for remap in remaps:
+    codes = category_codes(dataset_df[remap.column], remap.keys)
+    values = np.take(remap.values, codes)
+    if remap.labels is not None:
+      values = pd.Categorical.from_codes(values, remap.labels)
+    dataset_df[remap.name] = values
+  return dataset_df
+
+
+def power_feature_names(powers_of):
+  powers = []
+  for _, column_powers in powers_of:
+    powers += [power for power in column_powers if power not in powers]
+  return [(column, power) for power in powers
+          for column, column_powers in powers_of if power in column_powers]
+
+
+def raise_to(values, power, out):
+  if power == 2:
+    return np.multiply(values, values, out=out)
+  if power == 3:
+    np.multiply(values, values, out=out)
+    return np.multiply(out, values, out=out)
+  if power == 0.5:
+    return np.sqrt(values, out=out)
+  return np.power(values, power, out=out)
+
+
+# Adds a column for every (column, powers) pair of `powers_of`, named like
+# POWER_SUFFIXES, grouped by power. All of them are computed into one
+# preallocated block that is attached to the frame with a single concat.
+def add_powers(dataset_df, powers_of, dtype=np.float64):
+  features = power_feature_names(powers_of)
+  sources = list(dict.fromkeys(column for column, _ in powers_of))
+  base = dataset_df[sources].to_numpy(dtype=dtype)
+  # Column-major, so each feature is written contiguously and pandas can
+  # take the block over without copying it.
+  block = np.empty((dataset_df.shape[0], len(features)), dtype=dtype, order='F')
+  for i, (column, power) in enumerate(features):
+    raise_to(base[:, sources.index(column)], power, block[:, i])
+  names = ['%s-%s' % (column, POWER_SUFFIXES.get(power, power))
+           for column, power in features]
+  powers_df = pd.DataFrame(block, index=dataset_df.index, columns=names,
+                           copy=False)
+  return pd.concat([dataset_df, powers_df], axis=1)
+
+
+# Discretizes `column` into integer codes 1..len(edges) + 1 over right-closed
+# bins (edges[i - 1], edges[i]], with 0 for missing values. The edges are
+# either fixed, or the cut points of `n_quantiles` equally populated bins
+# learned from the training data.
+Bins = namedtuple('Bins', ['column', 'edges', 'n_quantiles'])
+
+
+def fixed_bins(column, edges):
+  return Bins(column, tuple(edges), None)
+
+
+def quantile_bins(column, n_quantiles):
+  return Bins(column, None, n_quantiles)
+
+
+def fit_bin_edges(values, bins):
+  if bins.edges is not None:
+    return list(bins.edges)
+  quantiles = np.arange(1, bins.n_quantiles) / bins.n_quantiles
+  values = np.asarray(values, dtype=np.float64)
+  return np.unique(np.nanquantile(values, quantiles)).tolist()
+
+
+def digitize(values, edges):
+  values = np.asarray(values)
+  dtype = np.int8 if len(edges) < 127 else np.int16
+  codes = np.searchsorted(edges, values, side='left').astype(dtype)
+  codes += 1
+  if values.dtype.kind == 'f':
+    codes[np.isnan(values)] = 0
+  return codes
+
+
+# Replaces every column of `bins_list` with its bin codes in one searchsorted
+# pass per column. `bin_edges` maps columns to edges; columns missing from it
+# have their edges fitted on this frame and stored there.
+def add_bins(dataset_df, bins_list, bin_edges):
+  for bins in bins_list:
+    if bins.column not in bin_edges:
+      bin_edges[bins.column] = fit_bin_edges(dataset_df[bins.column], bins)
+    dataset_df[bins.column] = digitize(dataset_df[bins.column],
+                                       bin_edges[bins.column])
+  return dataset_df
@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+from collections import namedtuple
+
+from profiling import profiled
+
+# Fills the missing values of `columns` with a constant `value`, or with their
+# median or mode in the training set. With `by`, the median or mode is learned
+# per group of that column; rows of a group that was not seen, or had nothing
+# but missing values, fall back to the statistic over the whole column.
+Fill = namedtuple('Fill', ['columns', 'strategy', 'value', 'by'])
+
+
+def constant(columns, value):
+  return Fill(list(columns), 'constant', value, None)
+
+
+def median(columns, by=None):
+  return Fill(list(columns), 'median', None, by)
+
+
+def mode(columns, by=None):
+  return Fill(list(columns), 'mode', None, by)
+
+
+# Learns every statistic of a list of fills and applies them to later batches.
+# `values` maps each column to its fill value; `group_values` maps grouped
+# columns to their `by` column and a {group: value} dict. Both only hold plain
+# Python values, so they can be stored as JSON.
+#
+# partial_fit() learns the same statistics from batches of rows, from
+# `counts`: the number of times each value was seen in each learned column,
+# as [value, count] pairs, and per group for grouped columns.
+class Imputer:
+
+  def __init__(self, fills):
+    self.fills = list(fills)
+    self.values = None
+    self.group_values = None
+    self.counts = None
+
+  @profiled
+  def fit(self, dataset_df):
+    self.values, self.group_values = {}, {}
+    for fill in self.fills:
+      if fill.strategy == 'constant':
+        self.values.update(dict.fromkeys(fill.columns, fill.value))
+        continue
+      learn = LEARNERS[fill.strategy]
+      self.values.update(learn(dataset_df, fill.columns))
+      if fill.by:
+        for column, stats in learn_by_group(dataset_df, fill, learn).items():
+          self.group_values[column] = {'by': fill.by, 'values': stats}
+    return self
+
+  # Adds the rows of `dataset_df` to those of the earlier calls; the
+  # statistics are those fit() would learn on all of them. Only value counts
+  # are kept, so memory grows with the distinct values of a column and not
+  # with its rows.
+  @profiled
+  def partial_fit(self, dataset_df):
+    if self.counts is None:
+      self.counts = {'values': {}, 'group_values': {}}
+    self.values, self.group_values = {}, {}
+    for fill in self.fills:
+      if fill.strategy == 'constant':
+        self.values.update(dict.fromkeys(fill.columns, fill.value))
+        continue
+      statistic = STATISTICS[fill.strategy]
+      for column in fill.columns:
+        counts = add_counts(self.counts['values'].get(column, []),
+                            dataset_df[column].value_counts())
+        self.counts['values'][column] = counts
+        self.values[column] = statistic(counts)
+        if fill.by:
+          self.group_values[column] = {
+            'by': fill.by,
+            'values': self.partial_fit_groups(dataset_df, fill.by, column,
+                                              statistic)}
+    return self
+
+  def partial_fit_groups(self, dataset_df, by, column, statistic):
+    group_counts = self.counts['group_values'].setdefault(column, {})
+    pairs = dataset_df.groupby(by, observed=True)[column].value_counts()
+    for group, counts in pairs.groupby(level=0, observed=True):
+      group = str(group)
+      group_counts[group] = add_counts(group_counts.get(group, []),
+                                       counts.droplevel(0))
+    return {group: statistic(counts)
+            for group, counts in sorted(group_counts.items()) if counts}
+
+  # Fills `dataset_df` in place, writing only the missing cells; columns with
+  # nothing missing are left untouched.
+  @profiled
+  def transform(self, dataset_df):
+    for column, value in self.values.items():
+      if value is None:
+        continue
+      missing = dataset_df[column].isna().to_numpy()
+      if not missing.any():
+        continue
+      if column in self.group_values:
+        grouped = self.group_values[column]
+        value = group_fill_values(dataset_df[grouped['by']][missing],
+                                  grouped['values'], value)
+      fill_cells(dataset_df, column, missing, value)
+    return dataset_df
+
+  def get_state(self):
+    state = {'values': self.values, 'group_values': self.group_values}
+    if self.counts is not None:
+      state['counts'] = self.counts
+    return state
+
+  @classmethod
+  def from_state(cls, fills, state):
+    imputer = cls(fills)
+    imputer.values = state['values']
+    imputer.group_values = state['group_values']
+    imputer.counts = state.get('counts')
+    return imputer
+
+
+def to_python(value):
+  return value.item() if isinstance(value, np.generic) else value
+
+
+def learn_medians(dataset_df, columns):
+  return {column: to_python(value)
+          for column, value in dataset_df[columns].median().items()}
+
+
+# Modes from one bincount per column; factorizing with sort=True breaks ties
+# towards the smallest value, as Series.mode()[0] does.
+def learn_modes(dataset_df, columns):
+  modes = {}
+  for column in columns:
+    codes, uniques = pd.factorize(dataset_df[column], sort=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    modes[column] = to_python(uniques[counts.argmax()]) if counts.any() else None
+  return modes
+
+
+LEARNERS = {'median': learn_medians, 'mode': learn_modes}
+
+
+# [value, count] pairs, sorted by value, with the counts of a value_counts()
+# Series added in.
+def add_counts(counts, value_counts):
+  totals = dict(counts)
+  for value, count in value_counts.items():
+    if count:
+      value = to_python(value)
+      totals[value] = totals.get(value, 0) + int(count)
+  return [[value, totals[value]] for value in sorted(totals)]
+
+
+# The middle value, or the mean of the two middle values, of the counted
+# values laid out in order.
+def median_of_counts(counts):
+  if not counts:
+    return None
+  values = [value for value, _ in counts]
+  ends = np.cumsum([count for _, count in counts])
+  lower = values[np.searchsorted(ends, (ends[-1] - 1) // 2, side='right')]
+  upper = values[np.searchsorted(ends, ends[-1] // 2, side='right')]
+  return to_python((np.float64(lower) + upper) / 2)
+
+
+# Ties go to the smallest value, as in learn_modes.
+def mode_of_counts(counts):
+  if not counts:
+    return None
+  best = max(count for _, count in counts)
+  return next(value for value, count in counts if count == best)
+
+
+STATISTICS = {'median': median_of_counts, 'mode': mode_of_counts}
+
+
+# Learns the statistic of every column of `fill` for all groups at once: the
+# medians in a single groupby aggregation, the modes by counting each
+# (group, value) pair in one bincount per column.
+def learn_by_group(dataset_df, fill, learn):
+  if learn is learn_medians:
+    medians = dataset_df.groupby(fill.by, observed=True)[fill.columns].median()
+    return {column: {str(group): to_python(value)
+                     for group, value in medians[column].dropna().items()}
+            for column in fill.columns}
+  group_codes, groups = pd.factorize(dataset_df[fill.by], sort=True)
+  stats = {}
+  for column in fill.columns:
+    codes, uniques = pd.factorize(dataset_df[column], sort=True)
+    seen = (group_codes >= 0) & (codes >= 0)
+    counts = np.bincount(group_codes[seen] * len(uniques) + codes[seen],
+                         minlength=len(groups) * len(uniques))
+    counts = counts.reshape(len(groups), len(uniques))
+    stats[column] = {str(group): to_python(uniques[row.argmax()])
+                     for group, row in zip(groups, counts) if row.any()}
+  return stats
+
+
+# Fill values for the rows of `groups`. Groups are matched by their text,
+# since that is how the JSON state keys them.
+def group_fill_values(groups, stats, fallback):
+  table = np.array(list(stats.values()) + [fallback], dtype=object)
+  codes, groups = pd.factorize(groups)
+  lookup = pd.Index(list(stats)).get_indexer([str(group) for group in groups])
+  return np.take(table, np.append(lookup, -1)[codes])
+
+
+# Numeric fills take the column's dtype, and a category column first gets the
+# fill values it lacks as new categories. A text fill of a numeric column,
+# such as "None" in a text column read as all-NaN float64 from a batch where
+# it is entirely missing, turns the column into objects first, as fillna does.
+def fill_cells(dataset_df, column, missing, value):
+  series = dataset_df[column]
+  if series.dtype.kind in 'iuf':
+    if is_numeric(value):
+      value = np.asarray(value, dtype=series.dtype)
+    else:
+      dataset_df[column] = series.astype(object)
+  elif isinstance(series.dtype, pd.CategoricalDtype):
+    new = [category for category in pd.unique(np.atleast_1d(value))
+           if category not in series.cat.categories]
+    if new:
+      dataset_df[column] = series.cat.add_categories(new)
+  dataset_df.loc[missing, column] = value
+
+
+# A fill value, or the array of per-row group fills, of numbers only.
+def is_numeric(value):
+  return pd.api.types.infer_dtype(np.atleast_1d(value), skipna=True) in (
+    'integer', 'floating', 'mixed-integer-float', 'empty')
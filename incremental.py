@@ -0,0 +1,194 @@
+# Retrains the linear model as new months of sales are appended, from running
+# sums over the rows seen so far instead of the rows themselves.
+#
+#   python incremental.py fit STATE train.csv
+#   python incremental.py update STATE new.csv [new.csv ...]
+#   python incremental.py check STATE train.csv new.csv [...]
+#
+# `fit` runs solver's preprocessing and XGBoost feature selection on
+# train.csv. `update` reads only the new files: their rows go through that
+# same preprocessing and are added to the normal equations (X^T X, X^T y) and
+# to the imputation value counts. Both write the updated model to
+# --artifact for score.py. serve.py loads its artifact once at startup and
+# keeps serving the model it loaded, so it must be restarted after `update`.
+# `check` refits from scratch on the whole history, in the order the files
+# were added, and compares.
+#
+# The preprocessing the model sees stays the one `fit` learned: imputing old
+# rows with newer medians or modes, growing the one-hot vocabularies or
+# selecting features again would all need the old rows. The running
+# imputation statistics are kept next to it, and `update` lists the fills
+# that have moved away from the ones in use, a sign that a new `fit` is due.
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import solver
+from artifact import read_arrays, save_artifact, write_arrays
+from cross_validation import (design_products, fit_linear, solve_linear,
+                              standardization_of)
+from imputation import Imputer
+from loading import read_houses
+from preprocessing import IMPUTATIONS, Preprocessor
+
+ARTIFACT_FILE = 'model.artifact'
+CHECK_RTOL = 1e-6
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('command', choices=['fit', 'update', 'check'])
+  parser.add_argument('state_file')
+  parser.add_argument('csv_files', nargs='+')
+  parser.add_argument('--artifact', default=ARTIFACT_FILE,
+                      help='where fit and update write the model for '
+                           'score.py')
+  args = parser.parse_args()
+
+  if args.command == 'check':
+    ok = check(load_state(args.state_file), args.csv_files)
+    raise SystemExit(0 if ok else 1)
+  if args.command == 'fit':
+    train_file, *new_files = args.csv_files
+    state = fit(read_houses(train_file))
+  else:
+    new_files = args.csv_files
+    state = load_state(args.state_file)
+  for new_file in new_files:
+    update(state, read_houses(new_file))
+  report_drift(state)
+  save_state(args.state_file, state)
+  save_artifact(args.artifact, state.preprocessor,
+                state.normal_equations.solve())
+
+
+# Running normal equations of the training rows. They are kept for the design
+# standardized by the fixed `center` and `scale` of the first batch, which
+# keeps X^T X well conditioned: `gram` is D^T D and `moment` D^T y for
+# D = [(X - center) / scale, 1], and `y_sum` is the sum of the targets.
+class NormalEquations:
+
+  def __init__(self, center, scale):
+    self.center = center
+    self.scale = scale
+    width = len(center) + 1
+    self.gram = np.zeros((width, width))
+    self.moment = np.zeros(width)
+    self.y_sum = 0.0
+
+  def add(self, X, y):
+    y = np.asarray(y, dtype=np.float64)
+    gram, moment = design_products(X, y, self.center, self.scale)
+    self.gram += gram
+    self.moment += moment
+    self.y_sum += y.sum()
+    return self
+
+  # The model fit_linear() fits on all the rows added. Standardizing by their
+  # mean and standard deviation instead is a linear map of the design,
+  # D' = D T, so the sums follow as T^T gram T and T^T moment.
+  def solve(self):
+    n_rows = self.gram[-1, -1]
+    offset = self.y_sum / n_rows
+    mean = self.gram[:-1, -1] / n_rows
+    std = np.sqrt(np.maximum(np.diag(self.gram)[:-1] / n_rows - mean ** 2, 0))
+    center = self.center + self.scale * mean
+    scale = self.scale * std
+    scale[std == 0] = 1
+    T = np.identity(len(self.moment))
+    T[:-1, :-1] = np.diag(self.scale / scale)
+    T[-1, :-1] = -self.scale * mean / scale
+    moment = self.moment - offset * self.gram[:, -1]
+    return solve_linear(T.T @ self.gram @ T, T.T @ moment, center, scale,
+                        offset)
+
+
+# What `update` needs: the preprocessor fitted on the first batch, the
+# running imputation statistics and the normal equations.
+class State:
+
+  def __init__(self, preprocessor, imputer, normal_equations):
+    self.preprocessor = preprocessor
+    self.imputer = imputer
+    self.normal_equations = normal_equations
+
+
+def fit(train_df):
+  train_df, y_train = solver.split_target(train_df)
+  imputer = Imputer(IMPUTATIONS).partial_fit(train_df)
+  preprocessor, X_train = solver.fit_preprocessor(train_df, y_train)
+  normal_equations = NormalEquations(*standardization_of(X_train))
+  return State(preprocessor, imputer, normal_equations.add(X_train, y_train))
+
+
+def update(state, new_df):
+  new_df, y_new = solver.split_target(new_df)
+  state.imputer.partial_fit(new_df)
+  state.normal_equations.add(state.preprocessor.matrix(new_df), y_new)
+  return state
+
+
+def report_drift(state):
+  in_use = state.preprocessor.imputer
+  for column, value in state.imputer.values.items():
+    if value != in_use.values[column]:
+      print('%s: filled with %r, %r over all rows' %
+            (column, in_use.values[column], value))
+  for column, grouped in state.imputer.group_values.items():
+    moved = [group for group, value in grouped['values'].items()
+             if in_use.group_values[column]['values'].get(group) != value]
+    if moved:
+      print('%s: %d of the %s groups moved' %
+            (column, len(moved), grouped['by']))
+
+
+# Refits the imputation statistics and the linear model on every row of
+# `csv_files`, which must be the files the state was built from, and compares
+# them with the state's.
+def check(state, csv_files):
+  houses = [solver.split_target(read_houses(csv_file))
+            for csv_file in csv_files]
+  history_df = pd.concat([houses_df for houses_df, _ in houses])
+  y_history = pd.concat([y for _, y in houses])
+  imputer = Imputer(IMPUTATIONS).fit(history_df)
+  same_imputation = (imputer.values == state.imputer.values
+                     and imputer.group_values == state.imputer.group_values)
+  print('imputation statistics: %s' % ('match' if same_imputation
+                                       else 'DIFFER'))
+
+  X_history = state.preprocessor.matrix(history_df)
+  refit = fit_linear(X_history, y_history)
+  incremental = state.normal_equations.solve()
+  refit_pred = refit.predict(X_history)
+  pred_error = np.abs(incremental.predict(X_history) - refit_pred).max()
+  same_model = pred_error <= CHECK_RTOL * np.abs(refit_pred).max()
+  print('linear model: %s, predictions differ by %.3g over %d rows'
+        % ('match' if same_model else 'DIFFER', pred_error, len(y_history)))
+  return same_imputation and same_model
+
+
+def save_state(path, state):
+  meta, arrays = state.preprocessor.get_state()
+  normal_equations = state.normal_equations
+  meta['running_imputer'] = state.imputer.get_state()
+  meta['y_sum'] = normal_equations.y_sum
+  arrays.update(gram=normal_equations.gram, moment=normal_equations.moment,
+                center=normal_equations.center, scale=normal_equations.scale)
+  write_arrays(path, meta, arrays)
+
+
+def load_state(path):
+  meta, arrays = read_arrays(path)
+  preprocessor = Preprocessor.from_state(meta, arrays)
+  imputer = Imputer.from_state(IMPUTATIONS, meta['running_imputer'])
+  normal_equations = NormalEquations(np.array(arrays['center']),
+                                     np.array(arrays['scale']))
+  normal_equations.gram = np.array(arrays['gram'])
+  normal_equations.moment = np.array(arrays['moment'])
+  normal_equations.y_sum = meta['y_sum']
+  return State(preprocessor, imputer, normal_equations)
+
+
+if __name__ == '__main__':
+  main()
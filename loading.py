@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+  import pyarrow
+except ImportError:
+  pyarrow = None
+
+CACHE_DIR = '.data_cache'
+# Bump when SCHEMA changes, so stale caches are not read back.
+SCHEMA_VERSION = 2
+
+CATEGORICAL_COLUMNS = [
+  'MSZoning', 'Street', 'Alley', 'LotShape', 'LandContour', 'Utilities',
+  'LotConfig', 'LandSlope', 'Neighborhood', 'Condition1', 'Condition2',
+  'BldgType', 'HouseStyle', 'RoofStyle', 'RoofMatl', 'Exterior1st',
+  'Exterior2nd', 'MasVnrType', 'ExterQual', 'ExterCond', 'Foundation',
+  'BsmtQual', 'BsmtCond', 'BsmtExposure', 'BsmtFinType1', 'BsmtFinType2',
+  'Heating', 'HeatingQC', 'CentralAir', 'Electrical', 'KitchenQual',
+  'Functional', 'FireplaceQu', 'GarageType', 'GarageFinish', 'GarageQual',
+  'GarageCond', 'PavedDrive', 'PoolQC', 'Fence', 'MiscFeature', 'SaleType',
+  'SaleCondition',
+]
+
+# Smallest integer type holding the range of each count/area/year column in
+# the Ames data, as a nullable pandas type: a chunk or batch of houses gets the
+# same types whether or not it has missing values.
+INTEGER_COLUMNS = {
+  'Id': 'Int32', 'MSSubClass': 'Int16', 'LotArea': 'Int32',
+  'OverallQual': 'Int8', 'OverallCond': 'Int8', 'YearBuilt': 'Int16',
+  'YearRemodAdd': 'Int16', 'BsmtFinSF1': 'Int16', 'BsmtFinSF2': 'Int16',
+  'BsmtUnfSF': 'Int16', 'TotalBsmtSF': 'Int16', '1stFlrSF': 'Int16',
+  '2ndFlrSF': 'Int16', 'LowQualFinSF': 'Int16', 'GrLivArea': 'Int16',
+  'BsmtFullBath': 'Int8', 'BsmtHalfBath': 'Int8', 'FullBath': 'Int8',
+  'HalfBath': 'Int8', 'BedroomAbvGr': 'Int8', 'KitchenAbvGr': 'Int8',
+  'TotRmsAbvGrd': 'Int8', 'Fireplaces': 'Int8', 'GarageCars': 'Int8',
+  'GarageArea': 'Int16', 'WoodDeckSF': 'Int16', 'OpenPorchSF': 'Int16',
+  'EnclosedPorch': 'Int16', '3SsnPorch': 'Int16', 'ScreenPorch': 'Int16',
+  'PoolArea': 'Int16', 'MiscVal': 'Int32', 'MoSold': 'Int8',
+  'YrSold': 'Int16', 'SalePrice': 'Int32',
+}
+
+FLOAT_COLUMNS = ['LotFrontage', 'MasVnrArea', 'GarageYrBlt']
+
+
+# dtypes handed to read_csv. Integer columns are parsed as usual and narrowed
+# afterwards by compact_integers(): read_csv would silently wrap values that
+# overflow a narrow integer type, and fails on integer columns with NaN.
+def csv_dtypes():
+  dtypes = {column: 'category' for column in CATEGORICAL_COLUMNS}
+  dtypes.update({column: np.float32 for column in FLOAT_COLUMNS})
+  return dtypes
+
+
+# Values outside the range of a column's type widen it to Int64 rather than
+# wrapping around.
+def compact_integers(houses_df):
+  for column, dtype in INTEGER_COLUMNS.items():
+    if column not in houses_df:
+      continue
+    values = houses_df[column]
+    info = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+    if values.min() < info.min or values.max() > info.max:
+      dtype = 'Int64'
+    houses_df[column] = values.astype(dtype)
+  return houses_df
+
+
+# The integer columns as numpy columns, for code that computes on plain
+# arrays: their compact type when nothing is missing, float64 with NaN
+# otherwise, which holds every int32 value exactly.
+def numpy_integers(houses_df):
+  for column in INTEGER_COLUMNS:
+    if column not in houses_df:
+      continue
+    values = houses_df[column]
+    if not isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+      continue
+    if values.isna().any():
+      houses_df[column] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+      houses_df[column] = values.to_numpy(dtype=values.dtype.numpy_dtype)
+  return houses_df
+
+
+def read_csv_typed(path, chunksize=None):
+  reader = pd.read_csv(path, header=0, dtype=csv_dtypes(), chunksize=chunksize)
+  if chunksize is None:
+    return compact_integers(reader)
+  return (compact_integers(chunk) for chunk in reader)
+
+
+# Types a batch of houses given as dicts keyed like the CSV header, e.g. parsed
+# from JSON, the way read_csv_typed types a CSV. Fields a house leaves out are
+# missing values, like empty CSV cells; unknown fields are ignored.
+def read_records(records):
+  columns = list(INTEGER_COLUMNS) + FLOAT_COLUMNS + CATEGORICAL_COLUMNS
+  houses_df = pd.DataFrame.from_records(records, columns=columns)
+  dtypes = dict.fromkeys(INTEGER_COLUMNS, np.float64)
+  dtypes.update(csv_dtypes())
+  return compact_integers(houses_df.astype(dtypes))
+
+
+# Reads a train/test CSV with the compact schema. The typed frame is also
+# written to a Feather file under CACHE_DIR next to the CSV, which later calls
+# read back directly as long as it is newer than the CSV.
+def read_houses(path, cache_dir=CACHE_DIR):
+  cache_path = cache_path_of(path, cache_dir)
+  if pyarrow is not None and is_fresh(cache_path, path):
+    return pd.read_feather(cache_path)
+
+  houses_df = read_csv_typed(path)
+  if pyarrow is not None:
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+    houses_df.to_feather(temp_path)
+    os.replace(temp_path, cache_path)
+  return houses_df
+
+
+def cache_path_of(path, cache_dir):
+  name = '%s.v%d.feather' % (os.path.basename(path), SCHEMA_VERSION)
+  return os.path.join(os.path.dirname(os.path.abspath(path)), cache_dir, name)
+
+
+def is_fresh(cache_path, path):
+  return (os.path.exists(cache_path)
+          and os.path.getmtime(cache_path) >= os.path.getmtime(path))
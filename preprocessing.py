@@ -0,0 +1,290 @@
+import numpy as np
+import pandas as pd
+
+from encoding import OneHotEncoder
+from features import (Flag, Column, add_bins, add_flags, add_powers,
+                      add_remaps, compile_remap, fixed_bins)
+from imputation import Imputer, constant, median, mode
+from loading import numpy_integers
+from profiling import profiled
+
+TARGET = 'SalePrice'
+
+# Id only identifies a house; it is kept aside for the submission file.
+NON_FEATURES = [TARGET, 'Id']
+
+DROPPED_FEATURES = ['Utilities', 'MiscFeature', 'MiscVal', 'BsmtFinSF2',
+                    'LowQualFinSF', 'Exterior2nd', 'PoolArea', 'PoolQC',
+                    'Condition2', 'LandSlope', 'Street', 'Heating']
+
+# Every statistic is learned from the raw training set, before any filling.
+IMPUTATIONS = [
+  constant(["PoolQC", "MiscFeature", "Alley", "Fence", "FireplaceQu",
+            "GarageType", "GarageFinish", "GarageQual", "GarageCond",
+            "BsmtQual", "BsmtCond", "BsmtExposure", "BsmtFinType1",
+            "BsmtFinType2", "MasVnrType"], "None"),
+  median(["LotFrontage"], by="Neighborhood"),
+  constant(["GarageYrBlt", "GarageArea", "GarageCars", "BsmtFinSF1",
+            "BsmtFinSF2", "BsmtUnfSF", "TotalBsmtSF", "MasVnrArea",
+            "BsmtFullBath", "BsmtHalfBath"], 0),
+  mode(['MSZoning', 'Electrical', 'KitchenQual', 'Exterior1st', 'Exterior2nd',
+        'SaleType', 'Functional']),
+]
+
+ONE_HOT_FEATURES = ['BsmtFinType1', 'BsmtFinSF1', 'BsmtFinType2', 'BsmtUnfSF',
+                    'MSSubClass', 'BldgType', 'HouseStyle', 'Foundation',
+                    'RoofStyle', 'RoofMatl', 'Exterior1st', 'MasVnrType',
+                    'ExterCond', 'GarageType', 'GarageFinish', 'GarageCond',
+                    'Fence', 'MSZoning', 'Neighborhood', 'Condition1',
+                    'LotArea', 'LotShape', 'LandContour', 'LotConfig', 'Alley',
+                    'PavedDrive', 'Electrical', 'MoSold', 'YrSold', 'SaleType',
+                    'SaleCondition']
+
+POLYNOMIAL_POWERS = (2, 3, 0.5)
+
+POLYNOMIAL_FEATURES = [(feature, POLYNOMIAL_POWERS) for feature in
+                       ['OverallQual', 'GrLivArea', 'GarageCars', 'GarageArea',
+                        'TotalBsmtSF', '1stFlrSF', 'FullBath', 'TotRmsAbvGrd',
+                        'Fireplaces', 'MasVnrArea', 'BsmtFinSF1', 'LotFrontage',
+                        'WoodDeckSF', 'OpenPorchSF', '2ndFlrSF']]
+
+SPECIAL_FLAGS = [
+  Flag('ExteriorMatch_Flag', 'Exterior2nd', 'eq', Column('Exterior1st')),
+  Flag('HasPool_Flag', 'PoolArea', 'ne', 0),
+  Flag('Diff2ndCondition_Flag', 'Condition1', 'ne', Column('Condition2')),
+]
+
+NONZERO_FLAGS = [
+  Flag('BsmtFinSf2_Flag', 'BsmtFinSF2', 'ne', 0),
+  Flag('LowQualFinSF_Flag', 'LowQualFinSF', 'ne', 0),
+]
+
+CONDITION_CLUSTERS = {"Norm":"Norm", "Feedr":"Street", "PosN":"Pos",
+                      "Artery":"Street", "RRAe":"Train", "RRNn":"Train",
+                      "RRAn":"Train", "PosA":"Pos", "RRNe":"Train"}
+
+# Values no cluster knows about, missing ones included, go to "Other".
+CLUSTER_REMAPS = [
+  compile_remap('HouseStyle', {"2Story":"2Story", "1Story":"1Story",
+                               "1.5Fin":"1.5Story", "1.5Unf":"1.5Story",
+                               "SFoyer":"SFoyer", "SLvl":"SLvl",
+                               "2.5Unf":"2.5Story", "2.5Fin":"2.5Story"},
+                "Other"),
+  compile_remap('GarageCond', {"None":"None", "Po":"Low", "Fa":"Low",
+                               "TA":"TA", "Gd":"High", "Ex":"High"}, "Other"),
+  compile_remap('Condition1', CONDITION_CLUSTERS, "Other"),
+  compile_remap('Condition2', CONDITION_CLUSTERS, "Other"),
+  compile_remap('Electrical', {"SBrkr":"SBrkr", "FuseF":"Fuse", "FuseA":"Fuse",
+                               "FuseP":"Fuse", "Mix":"Mix"}, "Other"),
+  compile_remap('SaleType', {"WD":"WD", "New":"New", "COD":"COD", "CWD":"CWD",
+                             "ConLD":"Oth", "ConLI":"Oth", "ConLw":"Oth",
+                             "Con":"Oth", "Oth":"Oth"}, "Oth"),
+]
+
+FLAG_REMAPS = [
+  compile_remap('LandSlope', {"Gtl":1, "Mod":0, "Sev":0}, 0,
+                name='GentleSlope_Flag'),
+  compile_remap('Heating', {"GasA":1, "GasW":0, "Grav":0, "Wall":0, "OthW":0,
+                            "Floor":0}, 0, name='GasA_Flag'),
+  compile_remap('CentralAir', {"Y":1, "N":0}, 0),
+]
+
+# Unknown grades rank as 0, the level of an absent basement, fireplace or
+# garage. Functional defaults to typical, as the data description says to
+# assume unless deductions are warranted.
+ORDINAL_REMAPS = [
+  compile_remap('BsmtQual', {"None":0, "Fa":1, "TA":2, "Gd":3, "Ex":4}, 0),
+  compile_remap('BsmtCond', {"None":0, "Po":1, "Fa":2, "TA":3, "Gd":4, "Ex":5},
+                0),
+  compile_remap('BsmtExposure', {"None":0, "No":1, "Mn":2, "Av":3, "Gd":4}, 0),
+  compile_remap('KitchenQual', {"Fa":1, "TA":2, "Gd":3, "Ex":4}, 0),
+  compile_remap('FireplaceQu', {"None":0, "Po":1, "Fa":2, "TA":3, "Gd":4,
+                                "Ex":5}, 0),
+  compile_remap('Functional', {"Sev":1, "Maj2":2, "Maj1":3, "Mod":4, "Min2":5,
+                               "Min1":6, "Typ":7}, 7),
+  compile_remap('ExterQual', {"Fa":1, "TA":2, "Gd":3, "Ex":4}, 0),
+  compile_remap('GarageQual', {"None":0, "Po":1, "Fa":1, "TA":2, "Gd":3,
+                               "Ex":3}, 0),
+  compile_remap('HeatingQC', {"Po":1, "Fa":2, "TA":3, "Gd":4, "Ex":5}, 0),
+]
+
+# quantile_bins(column, n) learns its edges from the training set instead.
+BINNED_FEATURES = [
+  fixed_bins('BsmtFinSF1', [1002.5, 2005, 3007.5]),
+  fixed_bins('BsmtUnfSF', [778.667, 1557.333]),
+  fixed_bins('LotArea', [5684.75, 7474, 8520, 9450, 10355.25, 11554.25,
+                         13613]),
+]
+
+
+# Holds every statistic learned from the training set, so that new batches of
+# houses can be transformed without re-reading or refitting on train.csv.
+class Preprocessor:
+
+  def __init__(self):
+    self.imputer = None
+    self.bin_edges = None
+    self.encoder = None
+    self.feature_columns = None
+    self.feature_mask = None
+
+  @property
+  def selected_features(self):
+    if self.feature_mask is None:
+      return self.feature_columns
+    return self.feature_columns[self.feature_mask]
+
+  def fit(self, train_df):
+    self.fit_features(train_df)
+    return self
+
+  @profiled
+  def fit_transform(self, train_df):
+    dataset_df = self.fit_features(train_df)
+    return self.select(self.encoder.transform(dataset_df))
+
+  @profiled
+  def transform(self, dataset_df, sparse=False):
+    dataset_df = self.engineer_features(dataset_df)
+    dataset_df = self.encoder.transform(dataset_df, sparse)
+    # Batches whose columns came in another order than train.csv, such as
+    # parsed JSON records, are put back in the order the model was fitted on.
+    if not dataset_df.columns.equals(self.feature_columns):
+      dataset_df = dataset_df[self.feature_columns]
+    return self.select(dataset_df)
+
+  # Like fit_transform() and transform(), but the selected features go
+  # straight into a float matrix instead of a one-hot DataFrame. `out` may be
+  # a slice of a larger buffer, so that several frames share one allocation.
+  @profiled
+  def fit_matrix(self, train_df, out=None, dtype=np.float32):
+    return self.fill_matrix(self.fit_features(train_df), out, dtype)
+
+  @profiled
+  def matrix(self, dataset_df, out=None, dtype=np.float32):
+    return self.fill_matrix(self.engineer_features(dataset_df), out, dtype)
+
+  # Learns every statistic from train_df and returns its engineered features,
+  # before one-hot encoding.
+  def fit_features(self, train_df):
+    self.imputer = Imputer(IMPUTATIONS).fit(train_df)
+    # Emptied so that engineer_features fits the bin edges on train_df.
+    self.bin_edges = {}
+    dataset_df = self.engineer_features(train_df)
+    self.encoder = OneHotEncoder(ONE_HOT_FEATURES).fit(dataset_df)
+    self.feature_columns = self.encoder.output_columns(dataset_df)
+    return dataset_df
+
+  def fill_matrix(self, dataset_df, out, dtype):
+    columns = self.selected_features
+    if out is None:
+      out = np.empty((len(dataset_df), len(columns)), dtype=dtype)
+    one_hot_positions = columns.get_indexer(self.encoder.feature_names)
+    plain = np.ones(len(columns), dtype=bool)
+    plain[one_hot_positions[one_hot_positions >= 0]] = False
+    for position in np.flatnonzero(plain):
+      out[:, position] = dataset_df[columns[position]].to_numpy()
+    return self.encoder.encode_into(dataset_df, out, one_hot_positions)
+
+  @profiled
+  def select(self, dataset_df):
+    if self.feature_mask is None:
+      return dataset_df
+    return dataset_df.loc[:, self.feature_mask]
+
+  @profiled
+  def engineer_features(self, dataset_df):
+    dataset_df = dataset_df.drop(NON_FEATURES, axis=1, errors='ignore')
+    dataset_df = numpy_integers(dataset_df)
+    handle_missing_data(dataset_df, self)
+    dataset_df = create_polynomial_features(dataset_df)
+    dataset_df = transform_features(dataset_df, self)
+    drop_features_from_set(DROPPED_FEATURES, dataset_df)
+    return dataset_df
+
+  # Splits the fitted state into JSON-friendly values and NumPy arrays, which
+  # is what artifact.py persists.
+  def get_state(self):
+    meta = {
+      'imputer': self.imputer.get_state(),
+      'bin_edges': self.bin_edges,
+      'one_hot_categories': self.encoder.categories,
+      'feature_columns': list(self.feature_columns),
+    }
+    arrays = {}
+    if self.feature_mask is not None:
+      arrays['feature_mask'] = np.asarray(self.feature_mask, dtype=bool)
+    return (meta, arrays)
+
+  @classmethod
+  def from_state(cls, meta, arrays):
+    preprocessor = cls()
+    preprocessor.imputer = Imputer.from_state(IMPUTATIONS, meta['imputer'])
+    preprocessor.bin_edges = meta['bin_edges']
+    preprocessor.encoder = OneHotEncoder(ONE_HOT_FEATURES)
+    preprocessor.encoder.categories = meta['one_hot_categories']
+    preprocessor.feature_columns = pd.Index(meta['feature_columns'])
+    preprocessor.feature_mask = arrays.get('feature_mask')
+    return preprocessor
+
+
+@profiled
+def drop_features_from_set(feats_to_drop, dataset_df):
+  dataset_df.drop(feats_to_drop, axis=1, inplace=True)
+
+
+@profiled
+def handle_missing_data(dataset_df, preprocessor):
+  preprocessor.imputer.transform(dataset_df)
+
+
+@profiled
+def create_polynomial_features(dataset_df):
+  return add_powers(dataset_df, POLYNOMIAL_FEATURES)
+
+
+@profiled
+def transform_features(dataset_df, preprocessor):
+  dataset_df = treat_special_features_in(dataset_df)
+  dataset_df = make_clusters_for(dataset_df)
+  dataset_df = make_flags_for(dataset_df)
+  dataset_df = make_bins_for(dataset_df, preprocessor.bin_edges)
+  dataset_df = represent_ordinal_in_num_in(dataset_df)
+  dataset_df = represent_nominal_as_str_in(dataset_df)
+  return dataset_df
+
+
+@profiled
+def treat_special_features_in(dataset_df):
+  return add_flags(dataset_df, SPECIAL_FLAGS)
+
+
+@profiled
+def make_clusters_for(dataset_df):
+  return add_remaps(dataset_df, CLUSTER_REMAPS)
+
+
+@profiled
+def make_flags_for(dataset_df):
+  dataset_df = add_flags(dataset_df, NONZERO_FLAGS)
+  return add_remaps(dataset_df, FLAG_REMAPS)
+
+
+@profiled
+def make_bins_for(dataset_df, bin_edges):
+  return add_bins(dataset_df, BINNED_FEATURES, bin_edges)
+
+
+@profiled
+def represent_ordinal_in_num_in(dataset_df):
+  return add_remaps(dataset_df, ORDINAL_REMAPS)
+
+
+# MSSubClass goes through Int64 so that a batch where it has missing values,
+# and is float, still gives '20' and not '20.0'; missing values stay missing.
+@profiled
+def represent_nominal_as_str_in(dataset_df):
+  subclass = dataset_df['MSSubClass'].astype('Int64')
+  dataset_df['MSSubClass'] = subclass.astype(str).where(subclass.notna())
+  dataset_df['BldgType'] = dataset_df['BldgType'].astype(str)
+  return dataset_df
@@ -0,0 +1,215 @@
+# Per-stage wall time and memory profile of the pipeline. Functions decorated
+# with @profiled are recorded while the module-level `profiler` is enabled
+# (solver --profile / --profile-trace); when it is not, the decorator costs a
+# single attribute check.
+#
+# Compare two JSON reports stage by stage:
+#   python profiling.py before.json after.json
+import functools
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def read_status_kb(field):
+  try:
+    with open('/proc/self/status') as status:
+      for line in status:
+        if line.startswith(field + ':'):
+          return int(line.split()[1]) * 1024
+  except OSError:
+    pass
+  return None
+
+
+def current_rss():
+  return read_status_kb('VmRSS')
+
+
+# Peak RSS since the last reset_peak_rss() where Linux allows resetting it,
+# otherwise the peak of the whole process so far.
+def peak_rss():
+  peak = read_status_kb('VmHWM')
+  if peak is None:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak *= 1 if sys.platform == 'darwin' else 1024
+  return peak
+
+
+def reset_peak_rss():
+  try:
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+      clear_refs.write('5')
+    return True
+  except OSError:
+    return False
+
+
+def describe(value):
+  if hasattr(value, 'memory_usage') and hasattr(value, 'dtypes'):
+    usage = value.memory_usage(index=False)
+    if not hasattr(usage, 'groupby'):
+      return {'type': type(value).__name__, 'shape': list(value.shape),
+              'bytes': int(usage), 'dtypes': {str(value.dtype): int(usage)}}
+    by_dtype = usage.groupby(value.dtypes.astype(str)).sum()
+    return {'type': type(value).__name__, 'shape': list(value.shape),
+            'bytes': int(usage.sum()),
+            'dtypes': {dtype: int(size) for dtype, size in by_dtype.items()}}
+  if isinstance(value, np.ndarray):
+    return {'type': 'ndarray', 'shape': list(value.shape),
+            'bytes': int(value.nbytes), 'dtypes': {str(value.dtype): int(value.nbytes)}}
+  if hasattr(value, 'nnz') and hasattr(value, 'indptr'):
+    size = value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+    return {'type': type(value).__name__, 'shape': list(value.shape),
+            'bytes': int(size), 'dtypes': {str(value.dtype): int(size)}}
+  return None
+
+
+# The frame a stage produced: its return value (or the first frame in a
+# returned tuple), or for stages that modify their input in place, the
+# first frame among the arguments.
+def describe_output(result, args):
+  candidates = list(result) if isinstance(result, tuple) else [result]
+  for value in candidates + list(args):
+    description = describe(value)
+    if description is not None:
+      return description
+  return None
+
+
+class Profiler:
+
+  def __init__(self):
+    self.enabled = False
+    self.records = []
+    self.open_records = []
+    self.stage_peaks = False
+    self.start_time = None
+
+  def enable(self):
+    self.enabled = True
+    self.records = []
+    self.stage_peaks = reset_peak_rss()
+    self.start_time = time.perf_counter()
+
+  def fold_peak(self):
+    peak = peak_rss()
+    for record in self.open_records:
+      record['peak_rss'] = max(record['peak_rss'], peak)
+    reset_peak_rss()
+
+  @contextmanager
+  def stage(self, name):
+    self.fold_peak()
+    parent = self.open_records[-1]['path'] if self.open_records else None
+    record = {
+      'name': name,
+      'path': name if parent is None else parent + ';' + name,
+      'depth': len(self.open_records),
+      'start': time.perf_counter() - self.start_time,
+      'rss_before': current_rss(),
+      'peak_rss': 0,
+    }
+    self.records.append(record)
+    self.open_records.append(record)
+    try:
+      yield record
+    finally:
+      self.fold_peak()
+      self.open_records.pop()
+      record['wall_time'] = time.perf_counter() - self.start_time - record['start']
+      record['rss_after'] = current_rss()
+
+  def report(self):
+    return {
+      'peak_rss_scope': 'stage' if self.stage_peaks else 'process',
+      'stages': self.records,
+    }
+
+  def write_json(self, path):
+    with open(path, 'w') as f:
+      json.dump(self.report(), f, indent=2)
+
+  # Chrome trace events: complete events nest into a flame chart in Perfetto,
+  # chrome://tracing or speedscope, with RSS as a counter track. A path ending
+  # in .folded gets folded stacks for flamegraph.pl instead.
+  def write_trace(self, path):
+    if path.endswith('.folded'):
+      self.write_folded(path)
+      return
+    events = []
+    for record in self.records:
+      args = {key: record[key] for key in ('peak_rss', 'rss_before', 'rss_after')}
+      if record.get('output'):
+        args['output'] = record['output']
+      events.append({'name': record['name'], 'ph': 'X', 'pid': os.getpid(),
+                     'tid': 0, 'ts': record['start'] * 1e6,
+                     'dur': record['wall_time'] * 1e6, 'args': args})
+      events.append({'name': 'rss', 'ph': 'C', 'pid': os.getpid(),
+                     'ts': record['start'] * 1e6,
+                     'args': {'bytes': record['rss_before']}})
+    with open(path, 'w') as f:
+      json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+  def write_folded(self, path):
+    self_times = {}
+    for record in self.records:
+      self_times[record['path']] = self_times.get(record['path'], 0) + record['wall_time']
+    for record in self.records:
+      parent = record['path'].rpartition(';')[0]
+      if parent:
+        self_times[parent] -= record['wall_time']
+    with open(path, 'w') as f:
+      for stack, seconds in self_times.items():
+        f.write('%s %d\n' % (stack, max(round(seconds * 1e6), 0)))
+
+
+profiler = Profiler()
+
+
+def profiled(fn):
+  @functools.wraps(fn)
+  def wrapper(*args, **kwargs):
+    if not profiler.enabled:
+      return fn(*args, **kwargs)
+    with profiler.stage(fn.__qualname__) as record:
+      result = fn(*args, **kwargs)
+      record['output'] = describe_output(result, args)
+    return result
+  return wrapper
+
+
+def totals_by_path(report):
+  totals = {}
+  for record in report['stages']:
+    total = totals.setdefault(record['path'], {'wall_time': 0, 'peak_rss': 0})
+    total['wall_time'] += record['wall_time']
+    total['peak_rss'] = max(total['peak_rss'], record['peak_rss'])
+  return totals
+
+
+def compare(before_file, after_file):
+  with open(before_file) as f:
+    before = totals_by_path(json.load(f))
+  with open(after_file) as f:
+    after = totals_by_path(json.load(f))
+  print('%-50s %10s %10s %8s %10s' % ('stage', 'before s', 'after s', 'change',
+                                      'peak MB'))
+  for path in after:
+    old = before.get(path)
+    new = after[path]
+    change = ('%+7.0f%%' % (100 * (new['wall_time'] / old['wall_time'] - 1))
+              if old and old['wall_time'] else '     new')
+    stage = '  ' * path.count(';') + path.rpartition(';')[2]
+    print('%-50s %10s %10.3f %8s %10.0f'
+          % (stage[:50], '%.3f' % old['wall_time'] if old else '-',
+             new['wall_time'], change, new['peak_rss'] / 2 ** 20))
+
+
+if __name__ == '__main__':
+  compare(*sys.argv[1:3])
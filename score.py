@@ -0,0 +1,75 @@
+# Scores a CSV of houses with a saved artifact, without importing the
+# training stack (sklearn, xgboost) or touching train.csv. The input is read
+# and scored a chunk at a time, so memory use depends on --chunk-rows and not
+# on the size of the file.
+#
+#   python score.py model.artifact test.csv submission.csv [--chunk-rows N]
+#
+# The output format follows its extension, see submission.SubmissionWriter.
+import argparse
+
+import numpy as np
+
+from artifact import load_artifact
+from loading import FLOAT_COLUMNS, INTEGER_COLUMNS, read_csv_typed, read_records
+from preprocessing import NON_FEATURES
+from submission import SubmissionWriter
+
+CHUNK_ROWS = 50000
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('artifact_file')
+  parser.add_argument('input_file')
+  parser.add_argument('output_file')
+  parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                      help='rows scored at a time, 0 reads the whole file')
+  args = parser.parse_args()
+
+  preprocessor, model = load_artifact(args.artifact_file)
+  score_file(preprocessor, model, args.input_file, args.output_file,
+             args.chunk_rows)
+
+
+def score_file(preprocessor, model, input_file, output_file,
+               chunk_rows=CHUNK_ROWS):
+  with SubmissionWriter(output_file) as writer:
+    for houses_df in read_in_chunks(input_file, chunk_rows):
+      y_pred = np.exp(model.predict(preprocessor.matrix(houses_df)))
+      writer.write(houses_df['Id'], y_pred)
+
+
+# Scores houses given as dicts, see loading.read_records. Returns their Ids
+# and predicted prices, or raises ValueError if a house cannot be priced.
+def score_records(preprocessor, model, records):
+  houses_df = read_records(records)
+  y_pred = np.exp(model.predict(preprocessor.matrix(houses_df)))
+  check_priced(preprocessor, houses_df, y_pred)
+  return (houses_df['Id'].to_numpy(dtype=object, na_value=None), y_pred)
+
+
+# A house without a numeric field that imputation does not fill, such as
+# GrLivArea, gets no price. The error names the unfilled fields each such
+# house is missing, by its position in `houses_df`.
+def check_priced(preprocessor, houses_df, y_pred):
+  unpriced = np.flatnonzero(np.isnan(y_pred))
+  if not len(unpriced):
+    return
+  filled = preprocessor.imputer.values
+  unfilled = [column for column in list(INTEGER_COLUMNS) + FLOAT_COLUMNS
+              if column not in NON_FEATURES and filled.get(column) is None]
+  missing = houses_df[unfilled].iloc[unpriced].isna().to_numpy()
+  raise ValueError('; '.join(
+    'house %d is missing %s' % (row, ', '.join(np.array(unfilled)[fields]))
+    for row, fields in zip(unpriced, missing)))
+
+
+def read_in_chunks(input_file, chunk_rows):
+  if not chunk_rows:
+    return [read_csv_typed(input_file)]
+  return read_csv_typed(input_file, chunksize=chunk_rows)
+
+
+if __name__ == '__main__':
+  main()
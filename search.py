@@ -0,0 +1,237 @@
+# Searches models, hyperparameters and feature-selection thresholds over the
+# preprocessed training matrix with k-fold CV, one candidate per task of a
+# process pool, and writes the candidates ranked by CV RMSE.
+#
+#   python search.py [--models linear ridge lasso xgboost] [--jobs N]
+#                    [--folds K] [--prune-margin M] [--output FILE]
+#
+# The matrix is written once to .npy files that every worker memory-maps, so
+# it is neither pickled nor copied per task. A candidate whose mean test RMSE
+# over its first MIN_FOLDS folds is worse than the best finished candidate by
+# more than --prune-margin is stopped there.
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from cross_validation import (design_products, fold_data, make_design,
+                              make_folds, run_folds, solve_normal_equations,
+                              standardization_of)
+
+RESULTS_FILE = 'search_results.csv'
+MIN_FOLDS = 3
+PRUNE_MARGIN = 0.1
+
+# A feature is kept when its XGBoost importance reaches `threshold` times the
+# mean importance: 1 is what solver selects with, 0 keeps every feature.
+Candidate = namedtuple('Candidate', ['model', 'params', 'threshold'])
+
+THRESHOLDS = (0, 0.5, 1, 2)
+GRIDS = {
+  'linear': [{}],
+  'ridge': [{'alpha': alpha} for alpha in (0.1, 1, 10, 100)],
+  'lasso': [{'alpha': alpha} for alpha in (1e-4, 3e-4, 1e-3, 3e-3)],
+  'xgboost': [{'max_depth': depth, 'learning_rate': rate, 'n_estimators': 200}
+              for depth, rate in itertools.product((2, 3, 4), (0.05, 0.1))],
+}
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--models', nargs='+', choices=list(GRIDS),
+                      default=list(GRIDS))
+  parser.add_argument('--jobs', type=int, default=None,
+                      help='worker processes (default: all cores)')
+  parser.add_argument('--folds', type=int, default=10)
+  parser.add_argument('--prune-margin', type=float, default=PRUNE_MARGIN,
+                      help='stop candidates this much worse than the best '
+                           'after %d folds, negative never stops' % MIN_FOLDS)
+  parser.add_argument('--output', default=RESULTS_FILE)
+  args = parser.parse_args()
+
+  import solver
+  from preprocessing import Preprocessor
+
+  train_df, _ = solver.acquire_data()
+  train_df, y_train = solver.split_target(train_df)
+  X_train = Preprocessor().fit_matrix(train_df)
+  importances = solver.xgboost_importances(X_train, y_train)
+
+  results = search(X_train, y_train, importances,
+                   candidates_for(args.models), n_folds=args.folds,
+                   n_jobs=args.jobs, prune_margin=args.prune_margin)
+  results.to_csv(args.output, index=False)
+  print(results.head(10).to_string(index=False))
+
+
+def candidates_for(models):
+  return [Candidate(model, params, threshold)
+          for model in models for params in GRIDS[model]
+          for threshold in THRESHOLDS]
+
+
+# Runs every candidate and returns one row per candidate, best first. Pruned
+# candidates rank after the finished ones. Every column is standardized once
+# here; a candidate takes the center and scale of the columns it keeps.
+def search(X, y, importances, candidates, n_folds=10, n_jobs=None,
+           prune_margin=PRUNE_MARGIN):
+  y = np.asarray(y, dtype=np.float64)
+  center, scale = standardization_of(X)
+  with tempfile.TemporaryDirectory() as shared_dir:
+    data = {
+      'X_path': save_shared(shared_dir, 'X', X),
+      'y_path': save_shared(shared_dir, 'y', y),
+      'center': center,
+      'scale': scale,
+      'importances': np.asarray(importances, dtype=np.float64),
+      'folds': make_folds(len(y), n_folds),
+      'best_rmse': multiprocessing.Value('d', np.inf),
+      'prune_margin': prune_margin,
+    }
+    rows = run_folds(evaluate_candidate, candidates, data, n_jobs)
+  results = pd.DataFrame(rows)
+  results = results.sort_values(['pruned', 'test_rmse'], kind='stable')
+  results.insert(0, 'rank', np.arange(1, len(results) + 1))
+  return results
+
+
+# Arrays keep their dtype, so a float32 matrix is memory-mapped as float32.
+def save_shared(directory, name, array):
+  path = os.path.join(directory, name + '.npy')
+  np.save(path, np.ascontiguousarray(array))
+  return path
+
+
+def shared_arrays():
+  if 'X' not in fold_data:
+    fold_data['X'] = np.load(fold_data['X_path'], mmap_mode='r')
+    fold_data['y'] = np.load(fold_data['y_path'], mmap_mode='r')
+  return (fold_data['X'], fold_data['y'])
+
+
+def evaluate_candidate(candidate):
+  X, y = shared_arrays()
+  importances = fold_data['importances']
+  mask = importances >= candidate.threshold * importances.mean()
+  scorer = SCORERS[candidate.model](X, mask, y, candidate.params)
+
+  start = time.perf_counter()
+  train_mse, test_mse = [], []
+  pruned = False
+  for fold, test_idx in enumerate(fold_data['folds']):
+    train_fold_mse, test_fold_mse = scorer(test_idx)
+    train_mse.append(train_fold_mse)
+    test_mse.append(test_fold_mse)
+    if fold + 1 == MIN_FOLDS and is_hopeless(np.sqrt(test_mse).mean()):
+      pruned = True
+      break
+
+  test_rmse = np.sqrt(test_mse)
+  if not pruned:
+    record_best(test_rmse.mean())
+  return {
+    'model': candidate.model,
+    'params': json.dumps(candidate.params, sort_keys=True),
+    'threshold': candidate.threshold,
+    'n_features': int(mask.sum()),
+    'train_rmse': np.sqrt(train_mse).mean(),
+    'test_rmse': test_rmse.mean(),
+    'test_rmse_std': test_rmse.std(),
+    'folds': len(test_mse),
+    'pruned': pruned,
+    'seconds': time.perf_counter() - start,
+  }
+
+
+def is_hopeless(test_rmse):
+  margin = fold_data['prune_margin']
+  return margin >= 0 and test_rmse > fold_data['best_rmse'].value * (1 + margin)
+
+
+def record_best(test_rmse):
+  best_rmse = fold_data['best_rmse']
+  with best_rmse.get_lock():
+    best_rmse.value = min(best_rmse.value, test_rmse)
+
+
+# A scorer is built once per candidate, from the shared matrix and the mask
+# of the columns the candidate keeps, and returns the train and test MSE of
+# the fold held out by `test_idx`.
+
+# OLS and ridge share one Gram matrix of the standardized design, accumulated
+# from the memory-mapped matrix a chunk of rows at a time; every fold
+# subtracts its held-out rows, as cross_validation.cross_validate_linear does.
+# The ridge penalty applies to the standardized coefficients, not to the
+# intercept.
+def gram_scorer(X, mask, y, params):
+  center, scale = fold_data['center'][mask], fold_data['scale'][mask]
+  y = y - y.mean()
+  gram, moment = design_products(X, y, center, scale, columns=mask)
+  y_sq_sum = y @ y
+  penalty = np.full(len(moment), params.get('alpha', 0.0))
+  penalty[-1] = 0
+
+  def score(test_idx):
+    test_design = make_design(X[test_idx][:, mask], center, scale)
+    test_y = y[test_idx]
+    coef, train_mse = solve_normal_equations(
+      gram - test_design.T @ test_design, moment - test_design.T @ test_y,
+      y_sq_sum - test_y @ test_y, penalty)
+    return (train_mse, np.mean((test_design @ coef - test_y) ** 2))
+  return score
+
+
+def lasso_scorer(X, mask, y, params):
+  from sklearn.exceptions import ConvergenceWarning
+  from sklearn.linear_model import Lasso
+  X = make_design(X[:, mask], fold_data['center'][mask],
+                  fold_data['scale'][mask])[:, :-1]
+
+  def score(test_idx):
+    train_mask = np.ones(len(y), dtype=bool)
+    train_mask[test_idx] = False
+    with warnings.catch_warnings():
+      warnings.simplefilter('ignore', ConvergenceWarning)
+      lasso = Lasso(alpha=params['alpha'], max_iter=5000)
+      lasso.fit(X[train_mask], y[train_mask])
+    return fold_mse(lasso, X, y, train_mask)
+  return score
+
+
+def xgboost_scorer(X, mask, y, params):
+  import xgboost as xgb
+  X = X[:, mask]
+
+  def score(test_idx):
+    train_mask = np.ones(len(y), dtype=bool)
+    train_mask[test_idx] = False
+    # One thread per booster: the pool already runs one candidate per core.
+    booster = xgb.XGBRegressor(tree_method='hist', n_jobs=1, **params)
+    booster.fit(X[train_mask], y[train_mask])
+    return fold_mse(booster, X, y, train_mask)
+  return score
+
+
+def fold_mse(model, X, y, train_mask):
+  errors = model.predict(X) - y
+  return (np.mean(errors[train_mask] ** 2), np.mean(errors[~train_mask] ** 2))
+
+
+SCORERS = {
+  'linear': gram_scorer,
+  'ridge': gram_scorer,
+  'lasso': lasso_scorer,
+  'xgboost': xgboost_scorer,
+}
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,219 @@
+# Serves price predictions from a saved artifact over HTTP, on a TCP port or a
+# Unix socket. The artifact is loaded once: a server keeps the model it
+# started with when solver.py or incremental.py replaces the file, and must
+# be restarted to serve the new one. Concurrent requests are gathered into
+# micro-batches, so each batch goes through one transform() and one predict()
+# instead of one per request.
+#
+#   python serve.py model.artifact [--port 8000 | --unix PATH]
+#                   [--max-batch-rows N] [--max-delay-ms MS]
+#
+# POST /predict takes a JSON house, or a list of houses, keyed like the
+# columns of test.csv, and answers {"Id": [...], "SalePrice": [...]}. A house
+# missing a numeric field that imputation does not fill, such as GrLivArea,
+# cannot be priced: the request gets a 400 naming the missing fields.
+# GET /health answers {"status": "ok"}.
+import argparse
+import asyncio
+import functools
+import http
+import json
+import os
+import stat
+
+from artifact import load_artifact
+from score import score_records
+
+MAX_BATCH_ROWS = 256
+MAX_DELAY_MS = 2.0
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('artifact_file')
+  parser.add_argument('--host', default='127.0.0.1')
+  parser.add_argument('--port', type=int, default=8000)
+  parser.add_argument('--unix', metavar='PATH',
+                      help='listen on this Unix socket instead of a TCP port')
+  parser.add_argument('--max-batch-rows', type=int, default=MAX_BATCH_ROWS,
+                      help='houses scored together at most')
+  parser.add_argument('--max-delay-ms', type=float, default=MAX_DELAY_MS,
+                      help='time a batch waits for more requests after its '
+                           'first one, 0 scores whatever is already queued')
+  args = parser.parse_args()
+
+  preprocessor, model = load_artifact(args.artifact_file)
+  score = functools.partial(score_records, preprocessor, model)
+  batcher = MicroBatcher(score, args.max_batch_rows, args.max_delay_ms / 1000)
+  try:
+    asyncio.run(serve(batcher, args))
+  except KeyboardInterrupt:
+    pass
+
+
+async def serve(batcher, args):
+  handler = functools.partial(handle_connection, batcher)
+  if args.unix:
+    remove_stale_socket(args.unix)
+    server = await asyncio.start_unix_server(handler, path=args.unix)
+    address = args.unix
+  else:
+    server = await asyncio.start_server(handler, args.host, args.port)
+    address = '%s:%d' % server.sockets[0].getsockname()[:2]
+  print('Serving on %s' % address, flush=True)
+  async with server:
+    await asyncio.gather(server.serve_forever(), batcher.run())
+
+
+def remove_stale_socket(path):
+  if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+    os.unlink(path)
+
+
+# Gathers the houses of concurrent requests into batches for `score`, which
+# takes a list of house dicts and returns their Ids and prices. A batch closes
+# once it holds max_rows houses, or max_delay seconds after its first request,
+# and is scored in a worker thread while the next one fills up.
+class MicroBatcher:
+
+  def __init__(self, score, max_rows=MAX_BATCH_ROWS,
+               max_delay=MAX_DELAY_MS / 1000):
+    self.score = score
+    self.max_rows = max_rows
+    self.max_delay = max_delay
+    self.queue = asyncio.Queue()
+
+  async def predict(self, records):
+    future = asyncio.get_running_loop().create_future()
+    await self.queue.put((records, future))
+    return await future
+
+  async def run(self):
+    loop = asyncio.get_running_loop()
+    while True:
+      batch = await self.next_batch(loop)
+      records = [record for request, _ in batch for record in request]
+      try:
+        ids, y_pred = await loop.run_in_executor(None, self.score, records)
+      except Exception:
+        # One malformed house fails the whole batch; scoring the requests
+        # apart confines the error to the request that sent it.
+        await self.score_apart(loop, batch)
+        continue
+      start = 0
+      for request, future in batch:
+        end = start + len(request)
+        if not future.done():
+          future.set_result((ids[start:end], y_pred[start:end]))
+        start = end
+
+  async def next_batch(self, loop):
+    batch = [await self.queue.get()]
+    n_rows = len(batch[0][0])
+    deadline = loop.time() + self.max_delay
+    while n_rows < self.max_rows:
+      if self.queue.empty():
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+          break
+        try:
+          item = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+          break
+      else:
+        item = self.queue.get_nowait()
+      batch.append(item)
+      n_rows += len(item[0])
+    return batch
+
+  async def score_apart(self, loop, batch):
+    for records, future in batch:
+      try:
+        result = await loop.run_in_executor(None, self.score, records)
+      except Exception as error:
+        if not future.done():
+          future.set_exception(error)
+      else:
+        if not future.done():
+          future.set_result(result)
+
+
+# Minimal HTTP/1.1: one request at a time per connection, kept alive unless
+# the client sends "Connection: close".
+async def handle_connection(batcher, reader, writer):
+  try:
+    while True:
+      request = await read_request(reader)
+      if request is None:
+        break
+      method, path, headers, body = request
+      status, payload = await respond(batcher, method, path, body)
+      keep_alive = headers.get('connection', '').lower() != 'close'
+      write_response(writer, status, payload, keep_alive)
+      await writer.drain()
+      if not keep_alive:
+        break
+  except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+    pass
+  finally:
+    writer.close()
+
+
+async def read_request(reader):
+  request_line = await reader.readline()
+  if not request_line.strip():
+    return None
+  method, path, _ = request_line.decode('latin-1').split(' ', 2)
+  headers = {}
+  while True:
+    line = await reader.readline()
+    if line in (b'\r\n', b'\n', b''):
+      break
+    name, _, value = line.decode('latin-1').partition(':')
+    headers[name.strip().lower()] = value.strip()
+  body = await reader.readexactly(int(headers.get('content-length', 0)))
+  return (method, path, headers, body)
+
+
+async def respond(batcher, method, path, body):
+  if path == '/health':
+    return (200, {'status': 'ok'})
+  if path != '/predict':
+    return (404, {'error': 'unknown path %s' % path})
+  if method != 'POST':
+    return (405, {'error': 'use POST'})
+  try:
+    records = json.loads(body)
+  except ValueError as error:
+    return (400, {'error': 'invalid JSON: %s' % error})
+  if isinstance(records, dict):
+    records = [records]
+  if (not isinstance(records, list) or not records
+      or not all(isinstance(record, dict) for record in records)):
+    return (400, {'error': 'expected a house or a list of houses'})
+  try:
+    ids, y_pred = await batcher.predict(records)
+  except Exception as error:
+    return (400, {'error': '%s: %s' % (type(error).__name__, error)})
+  return (200, {'Id': to_json(ids), 'SalePrice': to_json(y_pred)})
+
+
+# NaN is not valid JSON. Ids come as Python ints, or None for a house sent
+# without one.
+def to_json(values):
+  return [None if value != value else value for value in values.tolist()]
+
+
+def write_response(writer, status, payload, keep_alive):
+  body = json.dumps(payload).encode('utf-8')
+  head = ('HTTP/1.1 %d %s\r\n'
+          'Content-Type: application/json\r\n'
+          'Content-Length: %d\r\n'
+          'Connection: %s\r\n\r\n'
+          % (status, http.HTTPStatus(status).phrase, len(body),
+             'keep-alive' if keep_alive else 'close'))
+  writer.write(head.encode('latin-1') + body)
+
+
+if __name__ == '__main__':
+  main()
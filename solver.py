@@ -1,418 +1,211 @@
+import argparse
+import functools
 import numpy as np
-import pandas as pd
 import sys
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-from sklearn.feature_selection import SelectFromModel
-
-from sklearn.model_selection import cross_validate
-from sklearn.linear_model import LinearRegression
 import xgboost as xgb
 
+from artifact import save_artifact
+from cross_validation import (cross_validate_linear, cross_validate_pipeline,
+                              fit_linear, fold_workers)
+from feature_cache import ArrayCache, fingerprint
+from loading import read_houses
+from preprocessing import TARGET, Preprocessor
+from profiling import profiled, profiler
+from submission import write_submission
+
 np.set_printoptions(threshold=sys.maxsize)
 
 import warnings
 warnings.filterwarnings(action="ignore", module="scipy", message="^internal gelsd")
 
-TARGET = 'SalePrice'
-
-
-def main():
-  acquire_data()
-  prepare_data()
-  do_cross_validation()
-  train_model()
-  predict()
-  exponentiate_pred_result()
-  write_result_csv()
+ARTIFACT_FILE = 'model.artifact'
+SUBMISSION_FILE = 'submission.csv'
+FEATURE_CACHE_DIR = '.feature_cache'
 
+# n_jobs=None lets xgboost use every core.
+XGBOOST_PARAMS = {'tree_method': 'hist', 'n_jobs': None}
 
 
+def main():
+  args = parse_args()
+  if args.profile or args.profile_trace:
+    profiler.enable()
+  run(args)
+  if args.profile:
+    profiler.write_json(args.profile)
+  if args.profile_trace:
+    profiler.write_trace(args.profile_trace)
+
+
+
+@profiled
+def run(args):
+  train_df, test_df = acquire_data()
+  preprocessor, X_train, y_train, X_pred = prepare_data(train_df, test_df)
+  if args.cv_in_fold:
+    do_cross_validation_in_folds(*split_target(train_df), n_jobs=args.cv_jobs)
+  else:
+    do_cross_validation(X_train, y_train, n_jobs=args.cv_jobs)
+  linear_regression = train_model(X_train, y_train)
+  save_artifact(ARTIFACT_FILE, preprocessor, linear_regression)
+  y_pred = predict(linear_regression, X_pred)
+  y_pred = exponentiate_pred_result(y_pred)
+  write_result_csv(y_pred, test_df)
+
+
+
+def parse_args():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--cv-in-fold', action='store_true',
+                      help='refit preprocessing and XGBoost feature selection '
+                           'inside every CV fold')
+  parser.add_argument('--cv-jobs', type=int, default=None,
+                      help='processes used for CV folds (default: all cores)')
+  parser.add_argument('--profile', metavar='JSON',
+                      help='write per-stage time and memory to this file')
+  parser.add_argument('--profile-trace', metavar='TRACE',
+                      help='write a Chrome trace of the stages (or folded '
+                           'stacks for flamegraph.pl if it ends in .folded)')
+  return parser.parse_args()
+
+
+
+@profiled
 def acquire_data():
-  global train_df, test_df, target_col
-
-  train_df = pd.read_csv('train.csv', header=0)
-  test_df = pd.read_csv('test.csv', header=0)
-  target_col = train_df[TARGET]
+  train_df = read_houses('train.csv')
+  test_df = read_houses('test.csv')
+  return (train_df, test_df)
   
 
 
-def prepare_data():
-  global train_df, test_df, combined_df, target_col
+# Returns the fitted preprocessor, the training matrix and target, then the
+# matrix of every frame in pred_dfs.
+@profiled
+def prepare_data(train_df, *pred_dfs):
+  train_df, y_train = split_target(train_df)
+  preprocessor, X_train, *X_preds = fit_preprocessor(train_df, y_train,
+                                                     *pred_dfs)
+  return (preprocessor, X_train, y_train, *X_preds)
+
 
-  drop_features_from_set([TARGET], train_df)
+@profiled
+def split_target(train_df):
+  target_col = train_df[TARGET].astype(np.float64)
+  train_df = train_df.drop([TARGET], axis=1)
   train_df, target_col = remove_outliers_in(train_df, target_col)
-  combined_df = concat_train_test_data(train_df, test_df)
-  handle_missing_data(combined_df)
-  create_polynomial_features(combined_df)
-  combined_df = transform_features(combined_df)
-  drop_features_from_set(['Utilities', 'MiscFeature', 'MiscVal', 'BsmtFinSF2',
-                      'LowQualFinSF', 'Exterior2nd', 'PoolArea', 'PoolQC',
-                      'Condition2', 'LandSlope', 'Street', 'Heating'], combined_df)
-  split_train_test_data()
-  log_transform(target_col)
-  select_features_with_xgboost()
-    
-
-def drop_features_from_set(feats_to_drop, dataset_df):
-  dataset_df.drop(feats_to_drop, axis=1, inplace=True)
+  return (train_df, log_transform(target_col))
+
+
+# The float32 design matrices of train_df and of every frame in pred_dfs are
+# row slices of a single buffer, with the training rows first. The training
+# rows are taken from the matrix the features were selected on, and are not
+# engineered a second time.
+@profiled
+def fit_preprocessor(train_df, y_train, *pred_dfs,
+                     xgboost_params=XGBOOST_PARAMS):
+  preprocessor = Preprocessor()
+  X_all = preprocessor.fit_matrix(train_df)
+  preprocessor.feature_mask = select_features_with_xgboost(X_all, y_train,
+                                                           xgboost_params)
+  n_rows = [len(train_df)] + [len(pred_df) for pred_df in pred_dfs]
+  buffer = np.empty((sum(n_rows), len(preprocessor.selected_features)),
+                    dtype=X_all.dtype)
+  X_train, *X_preds = np.split(buffer, np.cumsum(n_rows)[:-1])
+  np.compress(preprocessor.feature_mask, X_all, axis=1, out=X_train)
+  del X_all
+  for pred_df, X_pred in zip(pred_dfs, X_preds):
+    preprocessor.matrix(pred_df, out=X_pred)
+  return (preprocessor, X_train, *X_preds)
 
 
 def remove_outliers_in(train_df, target_col):
-  outliers_idx = train_df[(train_df['GrLivArea']>4000)].index
+  outliers_idx = train_df[(train_df['GrLivArea']>4000).fillna(False)].index
   train_df = train_df.drop(outliers_idx)
   target_col = target_col.drop(outliers_idx)
   return (train_df, target_col)
 
 
-def concat_train_test_data(train_df, test_df):
-  return pd.concat([train_df, test_df])
-
-
-def handle_missing_data(dataset_df):
-  fillna_with_None(dataset_df)
-  fillna_for_LotFrontage(dataset_df)
-  fillna_with_0(dataset_df)
-  fillna_with_mode(dataset_df)
-
-
-def fillna_with_None(dataset_df):
-  for feature in ("PoolQC", "MiscFeature", "Alley", "Fence", "FireplaceQu",
-                  "GarageType", "GarageFinish", "GarageQual", "GarageCond",
-                  "BsmtQual", "BsmtCond", "BsmtExposure", "BsmtFinType1",
-                  "BsmtFinType2", "MasVnrType"):
-    dataset_df[feature] = dataset_df[feature].fillna("None")  
-
-
-def fillna_for_LotFrontage(dataset_df):
-  dataset_df["LotFrontage"] = dataset_df.groupby("Neighborhood")["LotFrontage"].transform(
-                          lambda x: x.fillna(x.median()))
-
-
-def fillna_with_0(dataset_df):
-  for feature in ("GarageYrBlt", "GarageArea", "GarageCars", "BsmtFinSF1", 
-                  "BsmtFinSF2", "BsmtUnfSF", "TotalBsmtSF", "MasVnrArea",
-                  "BsmtFullBath", "BsmtHalfBath"):
-    dataset_df[feature] = dataset_df[feature].fillna(0) 
-
-
-def fillna_with_mode(dataset_df):
-  dataset_df['MSZoning'] = dataset_df['MSZoning']\
-                           .fillna(dataset_df['MSZoning'].mode()[0])
-  dataset_df['Electrical'] = dataset_df['Electrical']\
-                             .fillna(dataset_df['Electrical'].mode()[0])
-  dataset_df['KitchenQual'] = dataset_df['KitchenQual']\
-                              .fillna(dataset_df['KitchenQual'].mode()[0])
-  dataset_df['Exterior1st'] = dataset_df['Exterior1st']\
-                              .fillna(dataset_df['Exterior1st'].mode()[0])
-  dataset_df['Exterior2nd'] = dataset_df['Exterior2nd']\
-                              .fillna(dataset_df['Exterior2nd'].mode()[0])
-  dataset_df['SaleType'] = dataset_df['SaleType']\
-                           .fillna(dataset_df['SaleType'].mode()[0])
-  dataset_df["Functional"] = dataset_df["Functional"]\
-                             .fillna(dataset_df['Functional'].mode()[0])
-
-
-def create_polynomial_features(dataset_df):
-  create_quadratic_features(dataset_df)
-  create_cubic_features(dataset_df)
-  create_sqrt_features(dataset_df)
-
-
-def create_quadratic_features(dataset_df):
-  dataset_df["OverallQual-2"] = dataset_df["OverallQual"] ** 2
-  dataset_df["GrLivArea-2"] = dataset_df["GrLivArea"] ** 2
-  dataset_df["GarageCars-2"] = dataset_df["GarageCars"] ** 2
-  dataset_df["GarageArea-2"] = dataset_df["GarageArea"] ** 2
-  dataset_df["TotalBsmtSF-2"] = dataset_df["TotalBsmtSF"] ** 2
-  dataset_df["1stFlrSF-2"] = dataset_df["1stFlrSF"] ** 2
-  dataset_df["FullBath-2"] = dataset_df["FullBath"] ** 2
-  dataset_df["TotRmsAbvGrd-2"] = dataset_df["TotRmsAbvGrd"] ** 2
-  dataset_df["Fireplaces-2"] = dataset_df["Fireplaces"] ** 2
-  dataset_df["MasVnrArea-2"] = dataset_df["MasVnrArea"] ** 2
-  dataset_df["BsmtFinSF1-2"] = dataset_df["BsmtFinSF1"] ** 2
-  dataset_df["LotFrontage-2"] = dataset_df["LotFrontage"] ** 2
-  dataset_df["WoodDeckSF-2"] = dataset_df["WoodDeckSF"] ** 2
-  dataset_df["OpenPorchSF-2"] = dataset_df["OpenPorchSF"] ** 2
-  dataset_df["2ndFlrSF-2"] = dataset_df["2ndFlrSF"] ** 2
-
-
-def create_cubic_features(dataset_df):
-  dataset_df["OverallQual-3"] = dataset_df["OverallQual"] ** 3
-  dataset_df["GrLivArea-3"] = dataset_df["GrLivArea"] ** 3
-  dataset_df["GarageCars-3"] = dataset_df["GarageCars"] ** 3
-  dataset_df["GarageArea-3"] = dataset_df["GarageArea"] ** 3
-  dataset_df["TotalBsmtSF-3"] = dataset_df["TotalBsmtSF"] ** 3
-  dataset_df["1stFlrSF-3"] = dataset_df["1stFlrSF"] ** 3
-  dataset_df["FullBath-3"] = dataset_df["FullBath"] ** 3
-  dataset_df["TotRmsAbvGrd-3"] = dataset_df["TotRmsAbvGrd"] ** 3
-  dataset_df["Fireplaces-3"] = dataset_df["Fireplaces"] ** 3
-  dataset_df["MasVnrArea-3"] = dataset_df["MasVnrArea"] ** 3
-  dataset_df["BsmtFinSF1-3"] = dataset_df["BsmtFinSF1"] ** 3
-  dataset_df["LotFrontage-3"] = dataset_df["LotFrontage"] ** 3
-  dataset_df["WoodDeckSF-3"] = dataset_df["WoodDeckSF"] ** 3
-  dataset_df["OpenPorchSF-3"] = dataset_df["OpenPorchSF"] ** 3
-  dataset_df["2ndFlrSF-3"] = dataset_df["2ndFlrSF"] ** 3
-
-
-def create_sqrt_features(dataset_df):
-  dataset_df["OverallQual-Sq"] = np.sqrt(dataset_df["OverallQual"])
-  dataset_df["GrLivArea-Sq"] = np.sqrt(dataset_df["GrLivArea"])
-  dataset_df["GarageCars-Sq"] = np.sqrt(dataset_df["GarageCars"])
-  dataset_df["GarageArea-Sq"] = np.sqrt(dataset_df["GarageArea"])
-  dataset_df["TotalBsmtSF-Sq"] = np.sqrt(dataset_df["TotalBsmtSF"])
-  dataset_df["1stFlrSF-Sq"] = np.sqrt(dataset_df["1stFlrSF"])
-  dataset_df["FullBath-Sq"] = np.sqrt(dataset_df["FullBath"])
-  dataset_df["TotRmsAbvGrd-Sq"] = np.sqrt(dataset_df["TotRmsAbvGrd"])
-  dataset_df["Fireplaces-Sq"] = np.sqrt(dataset_df["Fireplaces"])
-  dataset_df["MasVnrArea-Sq"] = np.sqrt(dataset_df["MasVnrArea"])
-  dataset_df["BsmtFinSF1-Sq"] = np.sqrt(dataset_df["BsmtFinSF1"])
-  dataset_df["LotFrontage-Sq"] = np.sqrt(dataset_df["LotFrontage"])
-  dataset_df["WoodDeckSF-Sq"] = np.sqrt(dataset_df["WoodDeckSF"])
-  dataset_df["OpenPorchSF-Sq"] = np.sqrt(dataset_df["OpenPorchSF"])
-  dataset_df["2ndFlrSF-Sq"] = np.sqrt(dataset_df["2ndFlrSF"])
-
-
-def transform_features(dataset_df):
-  dataset_df = treat_special_features_in(dataset_df)
-  dataset_df = make_clusters_for(dataset_df)
-  dataset_df = make_flags_for(dataset_df)
-  dataset_df = make_bins_for(dataset_df)
-  dataset_df = represent_ordinal_in_num_in(dataset_df)
-  dataset_df = one_hot_encode_categorical_features_in(dataset_df)  
-  return dataset_df
-
-
-def treat_special_features_in(dataset_df):
-  def Exter2(col):
-    if col['Exterior2nd'] == col['Exterior1st']:
-      return 1
-    else:
-      return 0
-  dataset_df['ExteriorMatch_Flag'] = dataset_df.apply(Exter2, axis=1)
-
-  def PoolFlag(col):
-    if col['PoolArea'] == 0:
-      return 0
-    else:
-      return 1
-  dataset_df['HasPool_Flag'] = dataset_df.apply(PoolFlag, axis=1)
-
-  def ConditionMatch(col):
-    if col['Condition1'] == col['Condition2']:
-      return 0
-    else:
-      return 1
-  dataset_df['Diff2ndCondition_Flag'] = dataset_df.apply(ConditionMatch, axis=1)
-
-  return dataset_df
-
-
-def make_clusters_for(dataset_df):
-  dataset_df['HouseStyle'] = dataset_df['HouseStyle'].map({"2Story":"2Story", 
-                                                      "1Story":"1Story", 
-                                                      "1.5Fin":"1.5Story", 
-                                                      "1.5Unf":"1.5Story", 
-                                                      "SFoyer":"SFoyer", 
-                                                      "SLvl":"SLvl", 
-                                                      "2.5Unf":"2.5Story", 
-                                                      "2.5Fin":"2.5Story"})
-  dataset_df['GarageCond'] = dataset_df['GarageCond'].map(
-    {"None":"None", "Po":"Low", "Fa":"Low", "TA":"TA", "Gd":"High", "Ex":"High"})    
-  dataset_df['Condition1'] = dataset_df['Condition1'].map(
-    {"Norm":"Norm", "Feedr":"Street", "PosN":"Pos", "Artery":"Street", "RRAe":"Train",
-     "RRNn":"Train", "RRAn":"Train", "PosA":"Pos", "RRNe":"Train"})
-  dataset_df['Condition2'] = dataset_df['Condition2'].map(
-    {"Norm":"Norm", "Feedr":"Street", "PosN":"Pos", "Artery":"Street", "RRAe":"Train",
-     "RRNn":"Train", "RRAn":"Train", "PosA":"Pos", "RRNe":"Train"})     
-  dataset_df['Electrical'] = dataset_df['Electrical'].map(
-                                                      {"SBrkr":"SBrkr", "FuseF":"Fuse", 
-                                                       "FuseA":"Fuse", "FuseP":"Fuse", 
-                                                       "Mix":"Mix"})  
-  dataset_df['SaleType'] = dataset_df['SaleType'].map(
-                                                {"WD":"WD", "New":"New", "COD":"COD", 
-                                                "CWD":"CWD", "ConLD":"Oth", "ConLI":"Oth", 
-                                                "ConLw":"Oth", "Con":"Oth", "Oth":"Oth"})                                                                                                          
-  return dataset_df
-
-
-def make_flags_for(dataset_df):
-  dataset_df['BsmtFinSf2_Flag'] = dataset_df['BsmtFinSF2'].map(lambda x:0 if x==0 else 1)
-  dataset_df['LowQualFinSF_Flag'] = dataset_df['LowQualFinSF']\
-                                    .map(lambda x:0 if x==0 else 1)
-  dataset_df['GentleSlope_Flag'] = dataset_df['LandSlope'].map({"Gtl":1, "Mod":0, "Sev":0}) 
-  dataset_df['GasA_Flag'] = dataset_df['Heating']\
-                      .map({"GasA":1, "GasW":0, "Grav":0, "Wall":0, "OthW":0, "Floor":0})  
-  dataset_df['CentralAir'] = dataset_df['CentralAir'].map({"Y":1, "N":0})                      
-  return dataset_df  
-
-
-def make_bins_for(dataset_df):
-  dataset_df.loc[dataset_df['BsmtFinSF1']<=1002.5, 'BsmtFinSF1'] = 1
-  dataset_df.loc[(dataset_df['BsmtFinSF1']>1002.5) 
-               & (dataset_df['BsmtFinSF1']<=2005), 'BsmtFinSF1'] = 2
-  dataset_df.loc[(dataset_df['BsmtFinSF1']>2005) 
-               & (dataset_df['BsmtFinSF1']<=3007.5), 'BsmtFinSF1'] = 3
-  dataset_df.loc[dataset_df['BsmtFinSF1']>3007.5, 'BsmtFinSF1'] = 4
-  dataset_df['BsmtFinSF1'] = dataset_df['BsmtFinSF1'].astype(int)  
-
-  dataset_df.loc[dataset_df['BsmtUnfSF']<=778.667, 'BsmtUnfSF'] = 1
-  dataset_df.loc[(dataset_df['BsmtUnfSF']>778.667) 
-                         & (dataset_df['BsmtUnfSF']<=1557.333), 'BsmtUnfSF'] = 2
-  dataset_df.loc[dataset_df['BsmtUnfSF']>1557.333, 'BsmtUnfSF'] = 3
-  dataset_df['BsmtUnfSF'] = dataset_df['BsmtUnfSF'].astype(int)  
-
-  dataset_df.loc[dataset_df['LotArea']<=5684.75, 'LotArea'] = 1
-  dataset_df.loc[(dataset_df['LotArea']>5684.75) 
-                 & (dataset_df['LotArea']<=7474), 'LotArea'] = 2
-  dataset_df.loc[(dataset_df['LotArea']>7474) 
-                 & (dataset_df['LotArea']<=8520), 'LotArea'] = 3
-  dataset_df.loc[(dataset_df['LotArea']>8520) 
-                 & (dataset_df['LotArea']<=9450), 'LotArea'] = 4
-  dataset_df.loc[(dataset_df['LotArea']>9450) 
-                 & (dataset_df['LotArea']<=10355.25), 'LotArea'] = 5
-  dataset_df.loc[(dataset_df['LotArea']>10355.25) 
-                 & (dataset_df['LotArea']<=11554.25), 'LotArea'] = 6
-  dataset_df.loc[(dataset_df['LotArea']>11554.25) 
-                 & (dataset_df['LotArea']<=13613), 'LotArea'] = 7
-  dataset_df.loc[dataset_df['LotArea']>13613, 'LotArea'] = 8
-  dataset_df['LotArea'] = dataset_df['LotArea'].astype(int)  
-
-  return dataset_df
-
-
-def represent_ordinal_in_num_in(dataset_df):
-  dataset_df['BsmtQual'] = dataset_df['BsmtQual']\
-                           .map({"None":0, "Fa":1, "TA":2, "Gd":3, "Ex":4})
-  dataset_df['BsmtCond'] = dataset_df['BsmtCond']\
-                           .map({"None":0, "Po":1, "Fa":2, "TA":3, "Gd":4, "Ex":5})
-  dataset_df['BsmtExposure'] = dataset_df['BsmtExposure']\
-                               .map({"None":0, "No":1, "Mn":2, "Av":3, "Gd":4})   
-  dataset_df['KitchenQual'] = dataset_df['KitchenQual']\
-                              .map({"Fa":1, "TA":2, "Gd":3, "Ex":4})
-  dataset_df['FireplaceQu'] = dataset_df['FireplaceQu']\
-                              .map({"None":0, "Po":1, "Fa":2, "TA":3, "Gd":4, "Ex":5})  
-  dataset_df['Functional'] = dataset_df['Functional'].map(
-                  {"Sev":1, "Maj2":2, "Maj1":3, "Mod":4, "Min2":5, "Min1":6, "Typ":7})  
-  dataset_df['ExterQual'] = dataset_df['ExterQual'].map({"Fa":1, "TA":2, "Gd":3, "Ex":4})
-  dataset_df['GarageQual'] = dataset_df['GarageQual'].map(
-    {"None":0, "Po":1, "Fa":1, "TA":2, "Gd":3, "Ex":3})     
-  dataset_df['HeatingQC'] = dataset_df['HeatingQC']\
-                            .map({"Po":1, "Fa":2, "TA":3, "Gd":4, "Ex":5})                                                                           
-  return dataset_df
-
-
-def one_hot_encode_categorical_features_in(dataset_df):
-  dataset_df = pd.get_dummies(dataset_df, columns=["BsmtFinType1"], prefix="BsmtFinType1")
-  dataset_df = pd.get_dummies(dataset_df, columns=["BsmtFinSF1"], prefix="BsmtFinSF1")
-  dataset_df = pd.get_dummies(dataset_df, columns=["BsmtFinType2"], prefix="BsmtFinType2")
-  dataset_df = pd.get_dummies(dataset_df, columns=["BsmtUnfSF"], prefix="BsmtUnfSF")  
-  dataset_df['MSSubClass'] = dataset_df['MSSubClass'].astype(str)
-  dataset_df = pd.get_dummies(dataset_df, columns=["MSSubClass"], prefix="MSSubClass")
-  dataset_df['BldgType'] = dataset_df['BldgType'].astype(str)
-  dataset_df = pd.get_dummies(dataset_df, columns=["BldgType"], prefix="BldgType")    
-  dataset_df = pd.get_dummies(dataset_df, columns=["HouseStyle"], prefix="HouseStyle")
-  dataset_df = pd.get_dummies(dataset_df, columns=["Foundation"], prefix="Foundation")  
-  dataset_df = pd.get_dummies(dataset_df, columns=["RoofStyle"], prefix="RoofStyle")
-  dataset_df = pd.get_dummies(dataset_df, columns=["RoofMatl"], prefix="RoofMatl")  
-  dataset_df = pd.get_dummies(dataset_df, columns=["Exterior1st"], prefix="Exterior1st")
-  dataset_df = pd.get_dummies(dataset_df, columns=["MasVnrType"], prefix="MasVnrType")
-  dataset_df = pd.get_dummies(dataset_df, columns=["ExterCond"], prefix="ExterCond")
-  dataset_df = pd.get_dummies(dataset_df, columns=["GarageType"], prefix="GarageType")
-  dataset_df = pd.get_dummies(dataset_df, columns=["GarageFinish"], prefix="GarageFinish") 
-  dataset_df = pd.get_dummies(dataset_df, columns=["GarageCond"], prefix="GarageCond") 
-  dataset_df = pd.get_dummies(dataset_df, columns=["Fence"], prefix="Fence")
-  dataset_df = pd.get_dummies(dataset_df, columns=["MSZoning"], prefix="MSZoning")
-  dataset_df = pd.get_dummies(dataset_df, columns=["Neighborhood"], prefix="Neighborhood")
-  dataset_df = pd.get_dummies(dataset_df, columns=["Condition1"], prefix="Condition1") 
-  dataset_df = pd.get_dummies(dataset_df, columns=["LotArea"], prefix="LotArea")
-  dataset_df = pd.get_dummies(dataset_df, columns=["LotShape"], prefix="LotShape")
-  dataset_df = pd.get_dummies(dataset_df, columns=["LandContour"], prefix="LandContour")
-  dataset_df = pd.get_dummies(dataset_df, columns=["LotConfig"], prefix="LotConfig")  
-  dataset_df = pd.get_dummies(dataset_df, columns=["Alley"], prefix="Alley")
-  dataset_df = pd.get_dummies(dataset_df, columns=["PavedDrive"], prefix="PavedDrive") 
-  dataset_df = pd.get_dummies(dataset_df, columns=["Electrical"], prefix="Electrical")
-  dataset_df = pd.get_dummies(dataset_df, columns=["MoSold"], prefix="MoSold")
-  dataset_df = pd.get_dummies(dataset_df, columns=["YrSold"], prefix="YrSold")   
-  dataset_df = pd.get_dummies(dataset_df, columns=["SaleType"], prefix="SaleType")
-  dataset_df = pd.get_dummies(dataset_df, columns=["SaleCondition"], prefix="SaleCondition")   
-  return dataset_df
-
-
-def split_train_test_data():
-  trainset_length = get_trainset_length(train_df)
-  global X_train, X_pred
-  X_train = combined_df.iloc[:trainset_length, :]
-  X_pred = combined_df.iloc[trainset_length:, :]
-
-
-def get_trainset_length(train_df):
-  return train_df.shape[0]
-
-  
 def log_transform(target_col):
-  global y_train 
-  y_train = np.log1p(target_col)
+  return np.log1p(target_col)
 
 
-def select_features_with_xgboost():
-  global X_train, X_pred
-  xg_boost = xgb.XGBRegressor()
-  xg_boost.fit(X_train, y_train)
-  xgb_feat_reduction = SelectFromModel(xg_boost, prefit=True)
-  X_train = xgb_feat_reduction.transform(X_train)
-  X_pred = xgb_feat_reduction.transform(X_pred)
+# Keeping the features whose importance reaches the mean is SelectFromModel's
+# default.
+@profiled
+def select_features_with_xgboost(X_train, y_train, params=XGBOOST_PARAMS,
+                                 cache_dir=FEATURE_CACHE_DIR):
+  importances = xgboost_importances(X_train, y_train, params, cache_dir)
+  return importances >= importances.mean()
 
 
+# The booster's feature importances are cached under a fingerprint of the
+# data and parameters, so reruns on unchanged data skip the fit.
+def xgboost_importances(X_train, y_train, params=XGBOOST_PARAMS,
+                        cache_dir=FEATURE_CACHE_DIR):
+  importances = None
+  if cache_dir:
+    cache = ArrayCache(cache_dir)
+    key = fingerprint(X_train, y_train, dict(params, xgboost=xgb.__version__))
+    importances = cache.get(key)
+  if importances is None:
+    xg_boost = xgb.XGBRegressor(**params)
+    xg_boost.fit(X_train, y_train)
+    importances = xg_boost.feature_importances_
+    if cache_dir:
+      cache.put(key, importances)
+  return importances
 
-def do_cross_validation():
-  linear_regression = LinearRegression()
 
-  scores = cross_validate(linear_regression, 
-                          X_train, y_train, 
-                          cv=10, return_train_score=True,
-                          scoring='neg_mean_squared_error')
-  train_RMSE = np.sqrt(-1 * scores['train_score']).mean()
-  test_RMSE = np.sqrt(-1 * scores['test_score']).mean()
-  print('train_RMSE: ', train_RMSE)
-  print('test_RMSE: ', test_RMSE)
 
+@profiled
+def do_cross_validation(X_train, y_train, n_jobs=None):
+  train_RMSE, test_RMSE = cross_validate_linear(X_train, y_train, n_folds=10,
+                                                n_jobs=n_jobs)
+  print('train_RMSE: ', train_RMSE.mean())
+  print('test_RMSE: ', test_RMSE.mean())
 
 
-def train_model():
-  global linear_regression
-  linear_regression = LinearRegression()
-  linear_regression.fit(X_train, y_train)
 
+# When the folds run in parallel, each fold's XGBoost fit gets one thread:
+# with every core already busy with a fold, more threads only contend.
+@profiled
+def do_cross_validation_in_folds(train_df, y_train, n_jobs=None):
+  fit_features = fit_preprocessor
+  if fold_workers(n_jobs, 10) > 1:
+    fit_features = functools.partial(
+      fit_preprocessor, xgboost_params=dict(XGBOOST_PARAMS, n_jobs=1))
+  train_RMSE, test_RMSE = cross_validate_pipeline(train_df, y_train,
+                                                  fit_features, n_folds=10,
+                                                  n_jobs=n_jobs)
+  print('train_RMSE: ', train_RMSE.mean())
+  print('test_RMSE: ', test_RMSE.mean())
 
 
-def predict():
-  global y_pred
-  y_pred = linear_regression.predict(X_pred)
-  
+
+# Ordinary least squares like LinearRegression, but X^T X is accumulated in
+# float64 from the float32 matrix instead of fitting on a float64 copy of it.
+@profiled
+def train_model(X_train, y_train):
+  return fit_linear(X_train, y_train)
 
 
-def exponentiate_pred_result():
-  global y_pred
-  y_pred = np.exp(y_pred)
 
+@profiled
+def predict(linear_regression, X_pred):
+  return linear_regression.predict(X_pred)
+  
 
 
-def write_result_csv():
-  START_ID = 1461
-  TESTSET_SIZE = test_df.shape[0]
-  END_ID = START_ID + TESTSET_SIZE
-  filename = 'submission.csv'
-  headers = 'Id,SalePrice\n'
+@profiled
+def exponentiate_pred_result(y_pred):
+  return np.exp(y_pred)
 
-  f = open(filename, 'w')
-  f.write(headers)
-  for i in range(START_ID, END_ID):
-    current_house = str(i) + ',' + str(y_pred[i - START_ID]) + '\n'
-    f.write(current_house)
-  
+
+
+@profiled
+def write_result_csv(y_pred, test_df):
+  write_submission(SUBMISSION_FILE, test_df['Id'], y_pred)
   print('File writing done.')
 
 
@@ -422,4 +215,5 @@ def write_result_csv():
 
 
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+  main()